@@ -0,0 +1,100 @@
+"""Anonymous comments of a group, released in shuffled batches.
+
+Comments are only shown once ANONYMOUS_BATCH_SIZE of them have been
+submitted, and then only in whole batches: with a batch size of 3 and 7
+comments, 6 are shown and 1 is withheld until two more arrive. The released
+comments are shuffled with a seed derived from SECRET_KEY, the group and the
+release size, so the order says nothing about who submitted first, is the
+same in every worker (stable ETags) and is reshuffled whenever a new batch is
+released. Only the comment text leaves ``get_release``: no ids or timestamps.
+``released_ids`` lets search apply the same gate to its hits.
+
+The release set is computed once per group and cached. Entries are dropped
+when this process writes an anonymous review and expire after
+ANONYMOUS_CACHE_TTL seconds so other workers' writes show up too.
+"""
+import hashlib
+import random
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from cache import LRUCache
+from models import db, AnonymousReview, ArchivedAnonymousReview, review_tables
+
+Release = namedtuple("Release", "comments withheld batch_size")
+
+_cache = LRUCache(maxsize=1024)  # (table, group_id) -> (loaded_at, Release)
+
+
+def _shuffled(comments, group_id):
+    comments = list(comments)
+    secret = current_app.config.get("SECRET_KEY") or ""
+    digest = hashlib.sha256(f"{secret}:{group_id}:{len(comments)}".encode("utf-8")).digest()
+    random.Random(int.from_bytes(digest[:8], "big")).shuffle(comments)
+    return tuple(comments)
+
+
+def get_release(group_id, archived_at=None):
+    """Released anonymous comments of a group: Release(comments, withheld, batch_size)."""
+    table = review_tables(archived_at).anonymous_review
+    key = (table.__tablename__, group_id)
+    entry = _cache.get(key)
+    ttl = current_app.config.get("ANONYMOUS_CACHE_TTL", 60)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+
+    batch_size = max(current_app.config.get("ANONYMOUS_BATCH_SIZE", 3), 1)
+    has_text = (table.group_id == group_id, table.comment.is_not(None), func.trim(table.comment) != "")
+    total = db.session.execute(select(func.count(table.id)).where(*has_text)).scalar()
+    released = total - total % batch_size
+    comments = ()
+    if released:
+        # The oldest comments form the complete batches; only their text is loaded
+        comments = _shuffled(
+            (c.strip() for c in db.session.scalars(
+                select(table.comment).where(*has_text).order_by(table.id).limit(released))),
+            group_id,
+        )
+    release = Release(comments, total - released, batch_size)
+    _cache.set(key, (time.monotonic(), release))
+    return release
+
+
+def released_ids(group_id, archived_at=None):
+    """Ids of the group's anonymous reviews that ``get_release`` shows, for gating other views (search)."""
+    table = review_tables(archived_at).anonymous_review
+    batch_size = max(current_app.config.get("ANONYMOUS_BATCH_SIZE", 3), 1)
+    ids = db.session.scalars(
+        select(table.id)
+        .where(table.group_id == group_id, table.comment.is_not(None), func.trim(table.comment) != "")
+        .order_by(table.id)
+    ).all()
+    return frozenset(ids[:len(ids) - len(ids) % batch_size])
+
+
+# ---------------- INVALIDATION ---------------- #
+def invalidate(group_id=None):
+    if group_id is None:
+        _cache.clear()
+        return
+    for key, _ in _cache.items():
+        if key[1] == group_id:
+            _cache.pop(key)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (AnonymousReview, ArchivedAnonymousReview)):
+            invalidate(obj.group_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    # Archiving and group deletes move or drop rows set-based; both are rare
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        invalidate()
@@ -0,0 +1,90 @@
+"""Archiving closed terms.
+
+Once a subject's review deadline has passed, ``flask archive-terms`` moves
+its peer reviews, self-assessments and anonymous reviews out of the hot
+tables into the ``archived_*`` tables, a batch at a time, and stamps
+``Subject.archived_at``. Results of archived subjects are read from the
+archive tables (see ``models.review_tables``) and can no longer be changed.
+"""
+import logging
+from datetime import datetime, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, literal, select, update
+
+from grading import freeze_subject
+from models import db, Subject, Group, Setting, HOT, ARCHIVED
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def closed_subjects(now=None, term=None):
+    """Ids of unarchived subjects whose review deadline has passed."""
+    query = (
+        select(Subject.id)
+        .join(Setting, Setting.subject_id == Subject.id)
+        .where(Subject.archived_at.is_(None), Setting.deadline.is_not(None), Setting.deadline <= (now or datetime.now()))
+        .order_by(Subject.id)
+    )
+    if term:
+        query = query.where(Subject.term == term)
+    return db.session.scalars(query).all()
+
+
+def _move(hot, cold, subject_id, batch_size):
+    """Copy rows of one subject into the archive table and delete them, one committed batch at a time."""
+    columns = [c.name for c in hot.__table__.columns]
+    source = hot.__table__
+    in_subject = hot.group_id.in_(select(Group.id).where(Group.subject_id == subject_id))
+    moved = 0
+    while True:
+        ids = db.session.scalars(select(hot.id).where(in_subject).order_by(hot.id).limit(batch_size)).all()
+        if not ids:
+            return moved
+        db.session.execute(insert(cold).from_select(
+            [*columns, "subject_id"],
+            select(*(source.c[name] for name in columns), literal(subject_id)).where(source.c.id.in_(ids)),
+        ))
+        db.session.execute(delete(hot).where(hot.id.in_(ids)), execution_options={"synchronize_session": False})
+        db.session.commit()
+        moved += len(ids)
+
+
+def archive_subject(subject_id, batch_size=BATCH_SIZE):
+    """Freeze the final marks if needed, then move the subject's review rows to the archive tables.
+
+    Safe to rerun after an interruption: every batch is copied and deleted in
+    the same transaction. Returns {table name: rows moved}.
+    """
+    deadline = db.session.query(Setting.deadline).filter(Setting.subject_id == subject_id).scalar()
+    # Marks are computed from the hot rows, so they have to be frozen before those move
+    deadline_utc = deadline.astimezone(timezone.utc).replace(tzinfo=None) if deadline else None
+    freeze_subject(subject_id, unless_frozen_after=deadline_utc)
+
+    moved = {hot.__tablename__: _move(hot, cold, subject_id, batch_size) for hot, cold in zip(HOT, ARCHIVED)}
+    db.session.execute(update(Subject).where(Subject.id == subject_id).values(archived_at=datetime.utcnow()))
+    db.session.commit()
+    return moved
+
+
+@click.command("archive-terms")
+@click.option("--term", help="Only archive subjects of this term.")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True, help="Rows moved per transaction.")
+@click.option("--dry-run", is_flag=True, help="List the subjects that would be archived.")
+@with_appcontext
+def archive_command(term, batch_size, dry_run):
+    """Move the reviews of subjects whose deadline has passed into the archive tables."""
+    subject_ids = closed_subjects(term=term)
+    if not subject_ids:
+        click.echo("No closed subjects to archive.")
+        return
+    for subject_id in subject_ids:
+        if dry_run:
+            click.echo(f"Would archive subject {subject_id}")
+            continue
+        moved = archive_subject(subject_id, batch_size=batch_size)
+        logger.info("Archived subject %s: %s", subject_id, moved)
+        click.echo(f"Archived subject {subject_id}: " + ", ".join(f"{n} {table}" for table, n in moved.items()))
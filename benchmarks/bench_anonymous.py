@@ -0,0 +1,38 @@
+"""Anonymous comments of one group: the full table fetch vs the cached batch release.
+
+    python benchmarks/bench_anonymous.py [comments]
+"""
+import sys
+
+from sqlalchemy import insert
+
+from common import make_app, seed, timed
+
+
+def main():
+    comments = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = make_app()
+    ids = seed(app, groups=5, students_per_group=5)
+
+    from models import db, AnonymousReview
+    import anonymous_feedback
+
+    group_id = ids["group_ids"][0]
+    with app.app_context():
+        db.session.execute(insert(AnonymousReview), [
+            {"reviewee_id": ids["lecturer_id"], "group_id": group_id, "comment": f"Anonymous comment {i} " * 10}
+            for i in range(comments)
+        ])
+        db.session.commit()
+
+        for label, fn in (("full fetch (old)", lambda: AnonymousReview.query.filter_by(group_id=group_id).all()),
+                          ("release, cold", lambda: (anonymous_feedback.invalidate(),
+                                                     anonymous_feedback.get_release(group_id))),
+                          ("release, cached", lambda: anonymous_feedback.get_release(group_id))):
+            print(f"{label:<28}{timed(lambda: (db.session.expire_all(), fn())):>8.3f}ms")
+        release = anonymous_feedback.get_release(group_id)
+        print(f"{len(release.comments)} released, {release.withheld} withheld (batch size {release.batch_size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Student dashboard: payload rebuilt every request vs cached payload vs page hit, with query counts.
+
+    python benchmarks/bench_dashboard.py [groups]
+"""
+import sys
+
+from sqlalchemy import event
+
+from common import make_app, seed, login, timed
+
+
+def main():
+    groups = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    app = make_app()
+    ids = seed(app, groups=groups, students_per_group=5)
+
+    from models import db, User, GroupMember
+    import dashboard
+    from cache import page_cache
+
+    # One student enrolled in every group, so the payload has a row per group
+    with app.app_context():
+        student = User.query.filter_by(username="s1").one()
+        db.session.add_all(GroupMember(group_id=gid, id_number=student.id) for gid in ids["group_ids"][1:])
+        db.session.commit()
+    client = login(app.test_client(), "s1", "student")
+    # The student dashboard never renders flashes, and pages with pending flashes are not cached
+    with client.session_transaction() as session:
+        session.pop("_flashes", None)
+
+    queries = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *args: queries.append(1))
+
+    def rebuilt():
+        dashboard.invalidate()
+        page_cache.clear()
+        client.get("/dashboard")
+
+    def cached_payload():
+        page_cache.clear()
+        client.get("/dashboard")
+
+    print(f"{groups} groups on the dashboard")
+    print(f"{'':<28}{'time':>10}{'queries':>10}")
+    for label, fn in (("payload rebuilt", rebuilt), ("payload cached", cached_payload),
+                      ("page cache hit", lambda: client.get("/dashboard"))):
+        ms = timed(fn)
+        queries.clear()
+        fn()
+        print(f"{label:<28}{ms:>8.2f}ms{len(queries):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Deleting groups: ORM cascade (load every child, delete row by row) vs one
+DELETE relying on the ondelete="CASCADE" foreign keys.
+
+    python benchmarks/bench_deletes.py [groups] [students_per_group]
+"""
+import sys
+import time
+
+from sqlalchemy import event, func
+
+from common import make_app, seed, login
+
+
+def orm_cascade(app, group_id):
+    """What delete_group used to do: selectin-load the children and let the
+    unit of work delete them row by row."""
+    from models import db, Group
+    with app.app_context():
+        group = db.session.get(Group, group_id)
+        for child in (*group.members, *group.reviews):
+            db.session.delete(child)
+        db.session.delete(group)
+        db.session.commit()
+
+
+def main():
+    groups = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    per_group = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    app = make_app()
+    ids = seed(app, groups=groups, students_per_group=per_group)
+    client = login(app.test_client(), "lecturer", "lecturer")
+
+    from models import db, PeerReview
+
+    half = len(ids["group_ids"]) // 2
+    runs = {
+        "orm cascade": (ids["group_ids"][:half], lambda group_id: orm_cascade(app, group_id)),
+        "set-based (view)": (ids["group_ids"][half:], lambda group_id: client.post(f"/groups/{group_id}/delete")),
+    }
+    statements = {"n": 0}
+
+    def count(*args):
+        statements["n"] += 1
+
+    with app.app_context():
+        engine = db.engine
+        reviews = db.session.query(func.count(PeerReview.id)).filter(PeerReview.group_id == ids["group_ids"][0]).scalar()
+    event.listen(engine, "before_cursor_execute", count)
+
+    print(f"{half} groups per run, {per_group} students and {reviews} peer reviews per group")
+    for label, (group_ids, delete_group) in runs.items():
+        statements["n"] = 0
+        start = time.perf_counter()
+        for group_id in group_ids:
+            delete_group(group_id)
+        elapsed = (time.perf_counter() - start) * 1000 / len(group_ids)
+        print(f"{label:<20}{elapsed:>10.1f}ms/group{statements['n'] / len(group_ids):>10.0f} statements/group")
+
+    event.remove(engine, "before_cursor_execute", count)
+    with app.app_context():
+        print(f"peer reviews left: {db.session.query(func.count(PeerReview.id)).scalar()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cost of logging in request threads: print() vs a synchronous handler vs the queue handler.
+
+The sink sleeps on every write, like a stderr pipe a log shipper reads slowly.
+The second part times the /students listing and a CSV import with the queue
+handler, next to the old per-student print loop on its own.
+
+    python benchmarks/bench_logging.py [sink delay in microseconds]
+"""
+import io
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueListener
+
+from common import make_app, seed, login, timed
+
+
+class SlowStream(io.StringIO):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, s):
+        time.sleep(self.delay)
+        return super().write(s)
+
+
+def main():
+    delay = (int(sys.argv[1]) if len(sys.argv) > 1 else 200) / 1_000_000
+    app = make_app()
+    ids = seed(app, groups=20, students_per_group=6, reviews=False)
+
+    from logs import JSONFormatter, LogQueueHandler
+
+    records = 500
+    sink = SlowStream(delay)
+
+    def printed():
+        for i in range(records):
+            print(f"Student: {i}, Group: G, Subject: S", file=sink)
+
+    sync_logger = logging.getLogger("bench.sync")
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.INFO)
+    sync_handler = logging.StreamHandler(sink)
+    sync_handler.setFormatter(JSONFormatter())
+    sync_logger.addHandler(sync_handler)
+
+    queued_logger = logging.getLogger("bench.queued")
+    queued_logger.propagate = False
+    queued_logger.setLevel(logging.INFO)
+    target = logging.StreamHandler(sink)
+    target.setFormatter(JSONFormatter())
+    queue_handler = LogQueueHandler(queue.SimpleQueue())
+    QueueListener(queue_handler.queue, target).start()
+    queued_logger.addHandler(queue_handler)
+
+    def logged(logger):
+        return lambda: [logger.info("Student: %s, Group: %s, Subject: %s", i, "G", "S") for i in range(records)]
+
+    print(f"{records} records, sink write delay {delay * 1e6:.0f}us")
+    for label, fn in (("print()", printed), ("StreamHandler (sync)", logged(sync_logger)),
+                      ("LogQueueHandler", logged(queued_logger))):
+        print(f"{label:<28}{timed(fn, repeat=3):>10.2f}ms in the request thread")
+
+    # Request paths, with the app's queue handler already installed by create_app
+    client = login(app.test_client(), "lecturer", "lecturer")
+    from models import User, GroupMember
+
+    def old_print_loop():
+        with app.app_context():
+            students = User.query.join(GroupMember).filter(User.role == "student").all()
+            for s in students:
+                for m in s.memberships:
+                    print(f"Student: {s.first_name}, Group: {m.group.name}, Subject: {m.group.subject.name}",
+                          file=sink)
+
+    counter = iter(range(10**9))
+
+    def import_csv():
+        n = next(counter)
+        rows = "\n".join(f"{900000 + n * 100 + i},F,L,imp{n}_{i}@bench,imp{n}_{i},pw,{ids['group_ids'][0]}"
+                         for i in range(100))
+        data = {"file": (io.BytesIO(("id_number,first_name,last_name,email,username,password,group_id\n"
+                                     + rows).encode()), "students.csv")}
+        client.post("/students/import", data=data, content_type="multipart/form-data")
+
+    app.config["PAGE_CACHE_ENABLED"] = False
+    print(f"{'GET /students':<28}{timed(lambda: client.get('/students')):>10.2f}ms")
+    print(f"{'old per-student print loop':<28}{timed(old_print_loop):>10.2f}ms extra per listing")
+    print(f"{'POST /students/import (100)':<28}{timed(import_csv, repeat=5):>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
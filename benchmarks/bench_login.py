@@ -0,0 +1,70 @@
+"""Legitimate logins during a credential-stuffing burst, with and without the login rate limiter.
+
+One attacker IP sends ``ratio`` bad logins (random and real usernames) for
+every real login from a student's own IP; all requests share one process.
+
+    python benchmarks/bench_login.py [legit_logins] [ratio]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from common import make_app, seed, PASSWORD
+
+
+def run(app, label, legit, ratio):
+    import ratelimit
+
+    client = app.test_client()
+    students = [f"s{i}" for i in range(1, 11)]
+    attack = {"sent": 0, "rejected": 0}
+    legit_ms = []
+    legit_failed = 0
+
+    start = time.perf_counter()
+    for i in range(legit):
+        for j in range(ratio):
+            username = students[j % len(students)] if j % 2 else f"guess{i}_{j}"
+            r = client.post("/login", data={"username": username, "password": "hunter2", "role": "student"},
+                            environ_base={"REMOTE_ADDR": "203.0.113.7"})
+            attack["sent"] += 1
+            attack["rejected"] += r.status_code == 429
+
+        student = students[i % len(students)]
+        t = time.perf_counter()
+        r = client.post("/login", data={"username": student, "password": PASSWORD, "role": "student"},
+                        environ_base={"REMOTE_ADDR": f"198.51.100.{i % len(students)}"})
+        legit_ms.append((time.perf_counter() - t) * 1000)
+        legit_failed += r.status_code != 302
+        client.get("/logout")
+    elapsed = time.perf_counter() - start
+
+    legit_ms.sort()
+    print(f"{label:<18}{legit / elapsed:>8.1f} legit logins/s{legit_ms[len(legit_ms) // 2]:>8.1f}ms p50"
+          f"{legit_failed:>6} legit failed{attack['rejected']:>8}/{attack['sent']} attacks rejected early")
+    ratelimit.login_limiter.store.reset("ip:203.0.113.7")
+
+
+def main():
+    legit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ratio = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logging.disable(logging.WARNING)  # one line per failed login otherwise
+    app = make_app()
+    seed(app, groups=2, students_per_group=5, reviews=False)
+
+    from ratelimit import init_rate_limit
+
+    for label, overrides in (
+        ("no limiter", {"LOGIN_RATE_LIMIT_ENABLED": False}),
+        ("memory store", {"LOGIN_RATE_LIMIT_ENABLED": True}),
+        ("sqlite store", {"LOGIN_RATE_LIMIT_DB": os.path.join(tempfile.mkdtemp(), "login_failures.db")}),
+    ):
+        app.config.update(overrides)
+        init_rate_limit(app)
+        run(app, label, legit, ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Missing-reviews report for one large subject: the set-based query vs per-reviewer counting.
+
+    python benchmarks/bench_missing_reviews.py [students] [group size]
+"""
+import sys
+import time
+
+from sqlalchemy import insert
+
+from common import make_app
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = make_app()
+
+    from models import db, User, Subject, Group, GroupMember, PeerReview
+    import missing_reviews
+
+    with app.app_context():
+        lecturer = User(first_name="L", last_name="L", email="l@bench", username="l", password="x", role="lecturer")
+        db.session.add(lecturer)
+        db.session.flush()
+        subject = Subject(name="Big", lecturer_id=lecturer.id)
+        db.session.add(subject)
+        db.session.flush()
+        n_groups = students // size
+        db.session.execute(insert(Group), [{"name": f"G{i}", "subject_id": subject.id} for i in range(n_groups)])
+        group_ids = [g.id for g in Group.query.filter_by(subject_id=subject.id).order_by(Group.id)]
+        db.session.execute(insert(User), [
+            {"id_number": str(500000 + i), "first_name": f"S{i}", "last_name": "B", "email": f"s{i}@bench",
+             "username": f"s{i}", "password": "x", "role": "student"} for i in range(students)
+        ])
+        user_ids = [u.id for u in db.session.query(User.id).filter(User.role == "student").order_by(User.id)]
+        members = {gid: user_ids[i * size:(i + 1) * size] for i, gid in enumerate(group_ids)}
+        db.session.execute(insert(GroupMember), [
+            {"group_id": gid, "id_number": uid} for gid, uids in members.items() for uid in uids
+        ])
+        # Every other student has finished their reviews
+        db.session.execute(insert(PeerReview), [
+            {"group_id": gid, "reviewer_id": a, "reviewee_id": b, "score": 3}
+            for gid, uids in members.items() for a in uids[::2] for b in uids if a != b
+        ])
+        db.session.commit()
+
+        def old_counts():
+            # What get_completion_status offers: a count per reviewer, two queries per student
+            for gid, uids in members.items():
+                for uid in uids:
+                    PeerReview.query.filter_by(reviewer_id=uid, group_id=gid).count()
+
+        for label, fn in (("per-reviewer counts (old)", old_counts),
+                          ("missing pairs, HTML rows", lambda: missing_reviews.by_reviewer(subject.id)),
+                          ("missing pairs, CSV", lambda: "".join(missing_reviews.stream_csv(subject.id)))):
+            start = time.perf_counter()
+            fn()
+            print(f"{label:<30}{(time.perf_counter() - start) * 1000:>10.1f}ms")
+        rows = missing_reviews.by_reviewer(subject.id)
+        print(f"{students} students: {sum(len(r.reviewees) for r in rows)} missing reviews from {len(rows)} reviewers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Registration "already taken?" check: the old OR query vs Bloom filter + indexed id_number lookup.
+
+Password hashing is left out; only the uniqueness check is timed.
+
+    python benchmarks/bench_register.py [users]
+"""
+import sys
+import time
+
+from sqlalchemy import insert, or_, text
+
+from common import make_app, timed
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = make_app()
+
+    from models import db, User
+    import uniqueness
+
+    with app.app_context():
+        for offset in range(0, users, 10_000):
+            db.session.execute(insert(User), [
+                {"id_number": str(10_000_000 + i), "first_name": "F", "last_name": "L", "email": f"user{i}@bench",
+                 "username": f"user{i}", "password": "x", "role": "student"}
+                for i in range(offset, min(users, offset + 10_000))
+            ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        bloom = uniqueness.build()
+        print(f"{users} users, filter built in {(time.perf_counter() - start) * 1000:.0f}ms "
+              f"({len(bloom.bits) / 1024:.0f} KiB, {bloom.hashes} hashes)")
+
+        counter = iter(range(10**9))
+
+        def old_check():
+            n = next(counter)
+            return User.query.filter(or_(User.username == f"new{n}", User.email == f"new{n}@bench",
+                                         User.id_number == str(90_000_000 + n))).first()
+
+        def new_check():
+            n = next(counter)
+            taken = uniqueness.might_be_taken(f"new{n}", f"new{n}@bench") and db.session.query(User.id).filter(
+                or_(User.username == f"new{n}", User.email == f"new{n}@bench")).first()
+            return taken or db.session.query(User.id).filter(User.id_number == str(90_000_000 + n)).first()
+
+        def new_check_no_id():
+            n = next(counter)
+            return uniqueness.might_be_taken(f"new{n}", f"new{n}@bench") and db.session.query(User.id).filter(
+                or_(User.username == f"new{n}", User.email == f"new{n}@bench")).first()
+
+        db.session.execute(text("DROP INDEX ix_users_id_number"))
+        print(f"{'OR query, no id_number index':<32}{timed(old_check, repeat=20):>10.3f}ms")
+        db.session.execute(text("CREATE INDEX ix_users_id_number ON users (id_number)"))
+        print(f"{'OR query, id_number index':<32}{timed(old_check, repeat=500):>10.3f}ms")
+        print(f"{'filter + id_number index':<32}{timed(new_check, repeat=500):>10.3f}ms")
+        print(f"{'filter only (no id_number)':<32}{timed(new_check_no_id, repeat=5000):>10.3f}ms")
+
+        false_hits = sum(uniqueness.might_be_taken(f"free{i}", None) for i in range(10_000))
+        print(f"false positives: {false_hits / 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
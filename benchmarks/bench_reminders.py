@@ -0,0 +1,53 @@
+"""One reminder run over many incomplete students, with the file backend.
+
+    python benchmarks/bench_reminders.py [students]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from common import make_app
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    size = 5
+    app = make_app()
+
+    from models import db, User, Subject, Group, GroupMember
+    import reminders
+
+    path = os.path.join(tempfile.mkdtemp(), "reminders.jsonl")
+    with app.app_context():
+        lecturer = User(first_name="L", last_name="L", email="l@bench", username="l", password="x", role="lecturer")
+        db.session.add(lecturer)
+        db.session.flush()
+        subject = Subject(name="Big", lecturer_id=lecturer.id)
+        db.session.add(subject)
+        db.session.flush()
+        db.session.execute(insert(Group), [{"name": f"G{i}", "subject_id": subject.id} for i in range(students // size)])
+        group_ids = [g.id for g in Group.query.order_by(Group.id)]
+        db.session.execute(insert(User), [
+            {"first_name": f"S{i}", "last_name": "B", "email": f"s{i}@bench", "username": f"s{i}",
+             "password": "x", "role": "student"} for i in range(students)
+        ])
+        user_ids = [u.id for u in db.session.query(User.id).filter(User.role == "student").order_by(User.id)]
+        db.session.execute(insert(GroupMember), [
+            {"group_id": group_ids[i // size], "id_number": uid} for i, uid in enumerate(user_ids)
+        ])
+        db.session.commit()
+
+        backend = reminders.FileBackend(path)
+        for label in ("first run", "rerun (all deduplicated)"):
+            start = time.perf_counter()
+            result = reminders.send_reminders(backend)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{label:<28}{elapsed:>10.1f}ms  {result.sent} sent, {result.skipped} skipped")
+        print(f"{os.path.getsize(path) / 1024:.0f} KiB written to {path}")
+
+
+if __name__ == "__main__":
+    main()
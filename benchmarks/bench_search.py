@@ -0,0 +1,71 @@
+"""Searching review comments: LIKE scan vs the full-text index (FTS5 on SQLite).
+
+    python benchmarks/bench_search.py [comments]
+"""
+import random
+import sys
+import time
+
+from sqlalchemy import func, insert
+
+from common import make_app, seed, timed
+
+WORDS = ("helpful late meeting slides report code tested communication deadline quiet leader "
+         "bugs design presentation research friendly absent reliable").split()
+
+
+def main():
+    comments = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = make_app()
+    ids = seed(app, groups=10, students_per_group=5, reviews=False)
+
+    from models import db, Group, GroupMember, PeerReview
+    from search import rebuild, search
+
+    rng = random.Random(1)
+    with app.app_context():
+        members = db.session.query(GroupMember.group_id, GroupMember.id_number).all()
+        by_group = {}
+        for group_id, student_id in members:
+            by_group.setdefault(group_id, []).append(student_id)
+        pairs = [(g, a, b) for g, s in by_group.items() for a in s for b in s if a != b]
+
+        start = time.perf_counter()
+        for offset in range(0, comments, 10_000):
+            rows = []
+            for _ in range(min(10_000, comments - offset)):
+                group_id, reviewer, reviewee = rng.choice(pairs)
+                text = " ".join(rng.choices(WORDS, k=12))
+                if rng.random() < 0.001:
+                    text += " but didn't contribute to the final report"
+                rows.append({"group_id": group_id, "reviewer_id": reviewer, "reviewee_id": reviewee,
+                             "score": 3, "comment": text})
+            db.session.execute(insert(PeerReview), rows)
+        db.session.commit()
+        indexed = rebuild()
+        print(f"{comments} comments inserted and {indexed} indexed in {time.perf_counter() - start:.1f}s")
+
+        lecturer_id = ids["lecturer_id"]
+        needle = "didn't contribute"
+
+        def like_scan():
+            return (db.session.query(PeerReview.id)
+                    .join(Group, Group.id == PeerReview.group_id)
+                    .filter(PeerReview.comment.ilike(f"%{needle}%"))
+                    .order_by(PeerReview.id).limit(20).all())
+
+        def like_count():
+            return db.session.query(func.count(PeerReview.id)).filter(PeerReview.comment.ilike(f"%{needle}%")).scalar()
+
+        def fts():
+            return search(f'"{needle}"', lecturer_id, page_size=20)
+
+        print(f"matches: {like_count()} (LIKE), first page {len(fts()[0])} (FTS)")
+        print(f"{'LIKE first page':<24}{timed(like_scan, repeat=5):>10.2f}ms")
+        print(f"{'LIKE total count':<24}{timed(like_count, repeat=5):>10.2f}ms")
+        print(f"{'FTS ranked first page':<24}{timed(fts, repeat=20):>10.2f}ms")
+        print(f"{'FTS page 3':<24}{timed(lambda: search(needle, lecturer_id, page=3), repeat=20):>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Self-assessment reads: completion status and results page, plus stored bytes with compression.
+
+    python benchmarks/bench_self_assessment.py
+"""
+from sqlalchemy import event, func, text
+
+from common import make_app, seed, login, timed
+
+ANSWER = "I set up the database models, reviewed pull requests and wrote the report pages. " * 25
+
+
+def main():
+    app = make_app()
+    ids = seed(app, groups=10, students_per_group=8)
+
+    from models import db, PeerReview, SelfAssessment
+    from helpers import get_completion_status
+    from roster import get_roster
+
+    with app.app_context():
+        # Realistic answer lengths (the seed's are short)
+        for a in SelfAssessment.query.all():
+            a.summary = a.challenges = a.different = a.role = ANSWER
+        db.session.commit()
+
+        group_id = ids["group_ids"][0]
+        students = get_roster(group_id).members
+
+        def old_status():
+            # Previous helper: a count and a row fetch per student
+            for s in students:
+                PeerReview.query.filter_by(reviewer_id=s.id, group_id=group_id).count()
+                SelfAssessment.query.filter_by(user_id=s.id, group_id=group_id).first()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        for label, fn in (("completion, old", old_status),
+                          ("completion, new", lambda: get_completion_status(students, group_id))):
+            db.session.expire_all()
+            statements.clear()
+            fn()
+            queries = len(statements)
+            reads_text = any("summary" in s for s in statements)
+            print(f"{label:<28}{timed(lambda: (db.session.expire_all(), fn())):>8.2f}ms{queries:>6} queries"
+                  f"{'  (reads text)' if reads_text else ''}")
+
+        stored = db.session.execute(text(
+            "SELECT SUM(LENGTH(summary) + LENGTH(challenges) + LENGTH(different) + LENGTH(role)) FROM self_assessments"
+        )).scalar()
+        plain = db.session.query(func.count(SelfAssessment.id)).scalar() * 4 * len(ANSWER)
+        print(f"{'stored text':<28}{stored / 1024:>8.0f}KiB  ({plain / 1024:.0f}KiB uncompressed)")
+
+    client = login(app.test_client(), "lecturer", "lecturer")
+    app.config["PAGE_CACHE_ENABLED"] = False
+    url = f"/results?subject_id={ids['subject_id']}&group_id={ids['group_ids'][0]}"
+    print(f"{'GET /results':<28}{timed(lambda: client.get(url)):>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
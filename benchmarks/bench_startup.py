@@ -0,0 +1,51 @@
+"""Worker boot cost: importing the app module, building the app, first request.
+
+Each run happens in a fresh interpreter so nothing is already imported.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get("/login")
+t3 = time.perf_counter()
+client.get("/login")
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2,
+                  "second_request": t4 - t3, "modules": len(sys.modules)}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    env["DIRECT_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [run_once() for _ in range(runs)]
+    for key in ("import", "create_app", "first_request", "second_request"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"{key:<16}{statistics.median(values):>10.1f}ms (median of {runs})")
+    print(f"{'modules loaded':<16}{samples[-1]['modules']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Render time per page: no caching vs {% cache %} fragments vs full page cache.
+
+    python benchmarks/bench_templates.py
+"""
+import time
+
+from common import make_app, seed, login, timed
+
+
+def main():
+    app = make_app()
+    ids = seed(app, groups=20, students_per_group=6)
+    client = login(app.test_client(), "lecturer", "lecturer")
+
+    from cache import fragment_cache, page_cache, precompile_templates
+
+    pages = [
+        f"/results?subject_id={ids['subject_id']}&group_id={ids['group_ids'][0]}",
+        f"/subjects/{ids['subject_id']}/groups/view",
+        "/students",
+        "/dashboard",
+    ]
+
+    print(f"{'page':<45}{'no cache':>12}{'fragments':>12}{'page hit':>12}")
+    for url in pages:
+        app.config["PAGE_CACHE_ENABLED"] = False
+        cold = timed(lambda: client.get(url))
+
+        app.config["PAGE_CACHE_ENABLED"] = True
+
+        def fragments_only():
+            page_cache.clear()
+            client.get(url)
+        warm_fragments = timed(fragments_only)
+        page_hit = timed(lambda: client.get(url))
+        print(f"{url:<45}{cold:>10.2f}ms{warm_fragments:>10.2f}ms{page_hit:>10.2f}ms")
+
+    # Template compilation: parsing from source vs loading the on-disk bytecode
+    env = app.jinja_env
+    bytecode_cache = env.bytecode_cache
+    for label, bcc in (("compile from source", None), ("load from bytecode cache", bytecode_cache)):
+        env.bytecode_cache = bcc
+        env.cache.clear()
+        start = time.perf_counter()
+        precompile_templates(app)
+        print(f"{label:<45}{(time.perf_counter() - start) * 1000:>10.2f}ms")
+    env.bytecode_cache = bytecode_cache
+    fragment_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Shared setup for the benchmark scripts.
+
+Run the scripts from the repo root, e.g. ``python benchmarks/bench_templates.py``.
+They use a throwaway SQLite database, never the one in .env.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# Must be set before config.py is imported
+os.environ["DIRECT_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+PASSWORD = "bench-password"
+
+
+def make_app():
+    from app import create_app
+    from models import db
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(app, groups=20, students_per_group=5, reviews=True):
+    """Create one lecturer, one subject and ``groups`` fully reviewed groups."""
+    from werkzeug.security import generate_password_hash
+    from models import db, User, Subject, Group, GroupMember, PeerReview, SelfAssessment, AnonymousReview
+
+    hashed = generate_password_hash(PASSWORD)
+    with app.app_context():
+        lecturer = User(first_name="Bench", last_name="Lecturer", email="lecturer@bench", username="lecturer",
+                        password=hashed, role="lecturer", gender="Male")
+        db.session.add(lecturer)
+        db.session.flush()
+        subject = Subject(name="Benchmark Subject", lecturer_id=lecturer.id)
+        db.session.add(subject)
+        db.session.flush()
+
+        n = 0
+        for gi in range(groups):
+            group = Group(name=f"Group {gi}", subject_id=subject.id)
+            db.session.add(group)
+            db.session.flush()
+            members = []
+            for _ in range(students_per_group):
+                n += 1
+                student = User(id_number=str(100000 + n), first_name=f"Student{n}", last_name="Bench",
+                               email=f"s{n}@bench", username=f"s{n}", password=hashed, role="student")
+                db.session.add(student)
+                db.session.flush()
+                db.session.add(GroupMember(group_id=group.id, id_number=student.id))
+                members.append(student.id)
+            if not reviews:
+                continue
+            for reviewer in members:
+                for reviewee in members:
+                    if reviewer != reviewee:
+                        db.session.add(PeerReview(reviewer_id=reviewer, reviewee_id=reviewee, group_id=group.id,
+                                                  score=4, comment=f"Comment from {reviewer} to {reviewee}"))
+                db.session.add(SelfAssessment(user_id=reviewer, group_id=group.id, summary="Summary " * 20,
+                                              challenges="Challenges " * 20, different="Different " * 20,
+                                              role="Role " * 20, feedback="Feedback " * 20))
+                db.session.add(AnonymousReview(reviewee_id=reviewer, group_id=group.id, comment="Anonymous note"))
+        db.session.commit()
+        return {"subject_id": subject.id, "group_ids": [g.id for g in subject.groups], "lecturer_id": lecturer.id}
+
+
+def login(client, username, role):
+    client.post("/login", data={"username": username, "password": PASSWORD, "role": role})
+    # Rendering one layout page consumes the "Login successful" flash
+    client.get("/subjects" if role == "lecturer" else "/student/profile")
+    return client
+
+
+def timed(fn, repeat=20):
+    """Average milliseconds per call of ``fn``."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,280 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache, Undefined, nodes
+from jinja2.ext import Extension
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from models import db, Subject, Group, GroupMember, PeerReview, SelfAssessment, AnonymousReview, Setting, MarkSnapshot
+
+
+# ---------------- LRU STORE ---------------- #
+class LRUCache:
+    """Small thread-safe LRU used for rendered pages and fragments."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def items(self):
+        """Snapshot of the entries, safe to iterate while others write."""
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+page_cache = LRUCache()
+fragment_cache = LRUCache(maxsize=1024)
+
+
+# ---------------- TIME BUCKET ---------------- #
+def _time_bucket():
+    """PAGE_CACHE_TTL time bucket appended to version keys.
+
+    Every version key is computed from the database, so all workers agree on it.
+    The bucket only bounds how long a page can stay stale after a write made
+    outside the app that none of the stamped columns see.
+    """
+    ttl = current_app.config.get("PAGE_CACHE_TTL", 60)
+    bucket = int(time.time() // ttl) if ttl > 0 else 0
+    return f"|t{bucket}"
+
+
+# ---------------- VERSION KEYS ---------------- #
+def _stamp(model, column, group_filter):
+    """(count, latest timestamp) of a group-scoped table as scalar subqueries.
+
+    The count catches deletes, the timestamp inserts (and updates, for tables
+    with an ``updated_at`` column).
+    """
+    count = select(func.count(model.id)).where(group_filter(model.group_id)).scalar_subquery()
+    latest = select(func.max(column)).where(group_filter(model.group_id)).scalar_subquery()
+    return [count, latest]
+
+
+def _version(group_filter, extra=()):
+    cols = list(extra)
+    cols += _stamp(PeerReview, PeerReview.created_at, group_filter)
+    cols += _stamp(SelfAssessment, SelfAssessment.updated_at, group_filter)
+    cols += _stamp(AnonymousReview, AnonymousReview.created_at, group_filter)
+    cols += _stamp(GroupMember, GroupMember.joined_at, group_filter)
+    cols += _stamp(MarkSnapshot, MarkSnapshot.created_at, group_filter)
+    row = db.session.execute(select(*cols)).one()
+    return "|".join(str(v) for v in row) + _time_bucket()
+
+
+def subject_version(subject_id):
+    """Version key covering every group of a subject."""
+    group_ids = select(Group.id).where(Group.subject_id == subject_id)
+    return _version(
+        lambda col: col.in_(group_ids),
+        extra=[
+            select(Subject.archived_at).where(Subject.id == subject_id).scalar_subquery(),
+            select(func.count(Group.id)).where(Group.subject_id == subject_id).scalar_subquery(),
+            select(func.max(Group.id)).where(Group.subject_id == subject_id).scalar_subquery(),
+        ],
+    )
+
+
+def group_version(group_id):
+    """Version key for a single group."""
+    return _version(lambda col: col == group_id)
+
+
+def lecturer_version(lecturer_id):
+    """Version key for pages listing a lecturer's subjects, groups and rosters."""
+    subject_ids = select(Subject.id).where(Subject.lecturer_id == lecturer_id)
+    group_ids = select(Group.id).where(Group.subject_id.in_(subject_ids))
+    row = db.session.execute(select(
+        select(func.count(Subject.id)).where(Subject.id.in_(subject_ids)).scalar_subquery(),
+        select(func.max(Subject.id)).where(Subject.id.in_(subject_ids)).scalar_subquery(),
+        select(func.max(Subject.archived_at)).where(Subject.id.in_(subject_ids)).scalar_subquery(),
+        select(func.count(Group.id)).where(Group.id.in_(group_ids)).scalar_subquery(),
+        select(func.max(Group.id)).where(Group.id.in_(group_ids)).scalar_subquery(),
+        *_stamp(GroupMember, GroupMember.joined_at, lambda col: col.in_(group_ids)),
+    )).one()
+    return "|".join(str(v) for v in row) + _time_bucket()
+
+
+def student_version(student_id):
+    """Version key for pages listing a student's groups."""
+    row = db.session.execute(
+        select(func.count(GroupMember.id), func.max(GroupMember.joined_at))
+        .where(GroupMember.id_number == student_id)
+    ).one()
+    return "|".join(str(v) for v in row) + _time_bucket()
+
+
+def user_version():
+    """Version key for the dashboard / subject list of the logged-in user."""
+    if current_user.role == "lecturer":
+        return lecturer_version(current_user.id)
+    return student_version(current_user.id)
+
+
+# ---------------- SUBJECT SETTINGS ---------------- #
+SubjectSettings = namedtuple("SubjectSettings", "criteria max_score opens_at deadline")
+
+_settings = None          # subject_id -> SubjectSettings
+_settings_loaded_at = 0.0
+
+
+def load_settings():
+    """Load every subject's settings in one query."""
+    global _settings, _settings_loaded_at
+    rows = db.session.query(Setting.subject_id, Setting.criteria, Setting.max_score,
+                            Setting.opens_at, Setting.deadline).all()
+    _settings = {r.subject_id: SubjectSettings(r.criteria, r.max_score, r.opens_at, r.deadline) for r in rows}
+    _settings_loaded_at = time.monotonic()
+    return _settings
+
+
+def get_settings(subject_id):
+    """Cached settings of a subject, or None. Other workers' edits show up within SETTINGS_CACHE_TTL."""
+    ttl = current_app.config.get("SETTINGS_CACHE_TTL", 60)
+    if _settings is None or time.monotonic() - _settings_loaded_at > ttl:
+        load_settings()
+    return _settings.get(subject_id)
+
+
+def invalidate_settings():
+    global _settings
+    _settings = None
+
+
+@event.listens_for(Session, "after_flush")
+def _track_settings(session, flush_context):
+    if any(isinstance(obj, Setting) for obj in (*session.new, *session.dirty, *session.deleted)):
+        invalidate_settings()
+
+
+# ---------------- CONDITIONAL RESPONSES ---------------- #
+def conditional_page(version_fn):
+    """Serve a GET page with an ETag, 304s and a per-user rendered-page cache.
+
+    ``version_fn`` receives the view arguments and returns a string that
+    changes whenever the data behind the page changes, or ``None`` to skip
+    caching for this request.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or not current_user.is_authenticated:
+                return fn(*args, **kwargs)
+
+            # Exposed to templates so {% cache %} fragments share the page version
+            version = g.page_version = version_fn(**kwargs)
+
+            # Pending flash messages are part of the rendered page, never cache them
+            if (version is None or not current_app.config.get("PAGE_CACHE_ENABLED", True)
+                    or session.get("_flashes")):
+                return fn(*args, **kwargs)
+
+            # User id and role are part of the key so pages are never shared between users;
+            # the name is rendered in the page header and can be edited on the profile page
+            scope = (f"{current_user.id}:{current_user.role}:{current_user.first_name}:{current_user.last_name}:"
+                     f"{request.full_path}:{version}")
+            etag = hashlib.sha1(scope.encode("utf-8")).hexdigest()
+
+            if etag in request.if_none_match:
+                response = make_response("", 304)
+            else:
+                body = page_cache.get(etag)
+                if body is not None:
+                    response = make_response(body)
+                else:
+                    response = make_response(fn(*args, **kwargs))
+                    if response.status_code != 200 or session.get("_flashes"):
+                        return response
+                    page_cache.set(etag, response.get_data())
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
+
+
+# ---------------- TEMPLATE FRAGMENTS ---------------- #
+class FragmentCacheExtension(Extension):
+    """``{% cache "name", key, ... %}...{% endcache %}`` backed by ``fragment_cache``.
+
+    Keys are scoped to the logged-in user. If any key part is ``None`` or
+    undefined (e.g. no ``g.page_version`` for this request) the block is
+    rendered normally without caching.
+    """
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_render", [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        if not current_app.config.get("PAGE_CACHE_ENABLED", True) or \
+                any(p is None or isinstance(p, Undefined) for p in parts):
+            return caller()
+        user_id = current_user.get_id() if current_user.is_authenticated else None
+        key = (user_id, *parts)
+        html = fragment_cache.get(key)
+        if html is None:
+            html = caller()
+            fragment_cache.set(key, html)
+        return html
+
+
+def precompile_templates(app):
+    """Compile every template once so workers load bytecode instead of parsing."""
+    env = app.jinja_env
+    for name in env.list_templates(extensions=("html",)):
+        env.get_template(name)
+
+
+def init_cache(app):
+    page_cache.maxsize = app.config.get("PAGE_CACHE_SIZE", page_cache.maxsize)
+    fragment_cache.maxsize = app.config.get("FRAGMENT_CACHE_SIZE", fragment_cache.maxsize)
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    cache_dir = app.config.get("TEMPLATE_CACHE_DIR")
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    if app.config.get("PRECOMPILE_TEMPLATES", True):
+        precompile_templates(app)
@@ -1,24 +1,121 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (values already in the environment win)
 load_dotenv()
-print("DEBUG DIRECT_URL =", os.environ.get("DIRECT_URL"))
 
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
+
+def _int_env(name, default=None):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key")
 
     # Gunakan DIRECT_URL untuk migration, fallback ke DATABASE_URL
     SQLALCHEMY_DATABASE_URI = os.environ.get("DIRECT_URL") or os.environ.get("DATABASE_URL")
 
+    # Optional read replica for reporting pages (results, reviews, exports).
+    # Locally this can be a second SQLite file, e.g. sqlite:///instance/replica.db
+    REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    # Seconds a user keeps reading from the primary after submitting something
+    REPLICA_READ_YOUR_WRITES = int(os.environ.get("REPLICA_READ_YOUR_WRITES") or 30)
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
-        "pool_recycle": 300,  # reset connection setiap 5 minit
-    }
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # filled from the DB_POOL_* settings by metrics.configure_pool
+
+    # Connection pool sizing; size it against gunicorn workers x threads.
+    # Unset values keep SQLAlchemy's defaults (5 + 10 overflow, 30s timeout).
+    DB_POOL_SIZE = _int_env("DB_POOL_SIZE")
+    DB_MAX_OVERFLOW = _int_env("DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT = _int_env("DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE = _int_env("DB_POOL_RECYCLE", 300)  # reset connection setiap 5 minit
+    # "ping": SELECT 1 on every checkout; "event": no ping, a request that hits a dead connection
+    # fails and the pool reconnects after it (disconnects are counted in /metrics)
+    DB_DISCONNECT_HANDLING = os.environ.get("DB_DISCONNECT_HANDLING", "ping")
 
-    UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER") or os.path.join(BASE_DIR, "uploads")
     MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH") or 5 * 1024 * 1024)
+    # Rows validated and committed together by the CSV student import
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE") or 500)
+
+    REVIEWS_PAGE_SIZE = int(os.environ.get("REVIEWS_PAGE_SIZE") or 50)
+    SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE") or 20)
+
+    # Failed logins allowed per username from one client IP / per client IP within the window (seconds).
+    # Set LOGIN_RATE_LIMIT_DB to a SQLite file path to share the counts between workers.
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get("LOGIN_RATE_LIMIT_ENABLED", "1") != "0"
+    LOGIN_RATE_WINDOW = int(os.environ.get("LOGIN_RATE_WINDOW") or 300)
+    LOGIN_MAX_FAILURES_PER_USER = int(os.environ.get("LOGIN_MAX_FAILURES_PER_USER") or 10)
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get("LOGIN_MAX_FAILURES_PER_IP") or 50)
+    LOGIN_RATE_LIMIT_DB = os.environ.get("LOGIN_RATE_LIMIT_DB")
+    # Reverse proxies in front of the app that append to X-Forwarded-For (e.g. 1 for nginx);
+    # 0 trusts no header and uses the socket address, which behind a proxy is the proxy's
+    PROXY_FIX_X_FOR = int(os.environ.get("PROXY_FIX_X_FOR") or 0)
+
+    # Rendered-page cache for read-only pages (ETag / 304 + per-user LRU)
+    PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "1") != "0"
+    PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE") or 256)
+    # Upper bound on staleness from UPDATEs made by other workers; 0 = no bound
+    PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL") or 60)
+    FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE") or 1024)
+
+    SETTINGS_CACHE_TTL = int(os.environ.get("SETTINGS_CACHE_TTL") or 60)
+    # Per-user dashboard payload; other workers' writes show up within the TTL
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL") or 30)
+    # Group rosters (membership checks, names); other workers' changes show up within the TTL
+    ROSTER_CACHE_TTL = int(os.environ.get("ROSTER_CACHE_TTL") or 30)
+
+    # Anonymous comments are shown only in whole shuffled batches of this size (see anonymous_feedback.py)
+    ANONYMOUS_BATCH_SIZE = int(os.environ.get("ANONYMOUS_BATCH_SIZE") or 3)
+    ANONYMOUS_CACHE_TTL = int(os.environ.get("ANONYMOUS_CACHE_TTL") or 60)
+
+    # Self-assessment answers at least this long are stored zlib-compressed; 0 = never
+    TEXT_COMPRESSION_MIN_LENGTH = int(os.environ.get("TEXT_COMPRESSION_MIN_LENGTH") or 1024)
+
+    # JSON-lines logging through a background queue (see logs.py); LOG_FILE defaults to stderr
+    LOG_CONFIGURE = os.environ.get("LOG_CONFIGURE", "1") != "0"
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_JSON = os.environ.get("LOG_JSON", "1") != "0"
+    LOG_FILE = os.environ.get("LOG_FILE")
+
+    # Reminder emails (flask send-reminders): "file" writes JSON lines to REMINDER_FILE,
+    # "smtp" sends through SMTP_HOST, or "package.module:Class" for a custom backend
+    REMINDER_BACKEND = os.environ.get("REMINDER_BACKEND", "file")
+    REMINDER_FILE = os.environ.get("REMINDER_FILE") or os.path.join(BASE_DIR, "instance", "reminders.jsonl")
+    REMINDER_SENDER = os.environ.get("REMINDER_SENDER", "no-reply@peer-review.local")
+    SMTP_HOST = os.environ.get("SMTP_HOST", "localhost")
+    SMTP_PORT = int(os.environ.get("SMTP_PORT") or 587)
+    SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
+    SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+    SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "1") != "0"
+
+    # Opt-in request profiling (see profiling.py): PROFILE_SAMPLE_RATE of requests,
+    # plus every request slower than PROFILE_SLOW_MS if set
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+    PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(BASE_DIR, "instance", "profiles")
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE") or 0.01)
+    PROFILE_SLOW_MS = _int_env("PROFILE_SLOW_MS")
+    PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample")  # "sample" (.folded) or "cprofile" (.prof)
+    PROFILE_INTERVAL_MS = int(os.environ.get("PROFILE_INTERVAL_MS") or 5)
+    PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES") or 500)
+
+    # Background thread that closes review windows and finalizes marks
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "1") != "0"
+    SCHEDULER_INTERVAL = int(os.environ.get("SCHEDULER_INTERVAL") or 30)
+
+    # Jinja bytecode cache on disk, filled at startup
+    TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR") or os.path.join(BASE_DIR, "instance", "jinja_cache")
+    PRECOMPILE_TEMPLATES = os.environ.get("PRECOMPILE_TEMPLATES", "1") != "0"
+
+    # Production server (serve.py / gunicorn)
+    SERVER_BIND = os.environ.get("SERVER_BIND", "0.0.0.0:8000")
+    SERVER_WORKERS = _int_env("SERVER_WORKERS", (os.cpu_count() or 1) * 2 + 1)
+    SERVER_THREADS = _int_env("SERVER_THREADS", 1)
+    SERVER_TIMEOUT = _int_env("SERVER_TIMEOUT", 30)
+    # Seconds in-flight requests get to finish after SIGTERM
+    SERVER_GRACEFUL_TIMEOUT = _int_env("SERVER_GRACEFUL_TIMEOUT", 30)
@@ -0,0 +1,135 @@
+"""Per-user dashboard payload: one query, cached per user.
+
+Students get one row per group (subject, deadline, reviews given vs
+required, self-assessment done); lecturers one row per subject. Entries are
+dropped when this process writes a membership, review, self-assessment or
+subject change, and expire after DASHBOARD_CACHE_TTL seconds so writes made
+by other workers show up too.
+"""
+import hashlib
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import and_, event, exists, func, select
+from sqlalchemy.orm import Session, aliased
+
+from cache import LRUCache
+from models import db, User, Subject, Group, GroupMember, PeerReview, SelfAssessment, Setting
+
+Dashboard = namedtuple("Dashboard", "version rows group_ids")
+
+
+class StudentGroup(namedtuple("StudentGroup", "group_id group_name subject_id subject_name deadline "
+                                              "reviews_given reviews_required self_assessed")):
+    @property
+    def pending_reviews(self):
+        return max(self.reviews_required - self.reviews_given, 0)
+
+    @property
+    def completed(self):
+        return self.pending_reviews == 0 and self.self_assessed
+
+
+LecturerSubject = namedtuple("LecturerSubject", "id name term archived_at deadline group_count")
+
+_cache = LRUCache(maxsize=4096)  # user_id -> (loaded_at, Dashboard)
+
+
+def _student_rows(student_id):
+    me = aliased(GroupMember)
+    member, student = aliased(GroupMember), aliased(User)
+    group_size = (
+        select(func.count(member.id))
+        .join(student, student.id == member.id_number)
+        .where(member.group_id == Group.id, student.role == "student")
+        .scalar_subquery()
+    )
+    given = (
+        select(func.count(PeerReview.id))
+        .where(PeerReview.group_id == Group.id, PeerReview.reviewer_id == student_id)
+        .scalar_subquery()
+    )
+    assessed = exists().where(and_(SelfAssessment.group_id == Group.id, SelfAssessment.user_id == student_id))
+    rows = db.session.execute(
+        select(Group.id, Group.name, Subject.id, Subject.name, Setting.deadline, given, group_size, assessed)
+        .select_from(me)
+        .join(Group, Group.id == me.group_id)
+        .join(Subject, Subject.id == Group.subject_id)
+        .outerjoin(Setting, Setting.subject_id == Subject.id)
+        .where(me.id_number == student_id, Subject.archived_at.is_(None))
+        .order_by(Subject.name, Group.name)
+    )
+    return [StudentGroup(gid, gname, sid, sname, deadline, n_given, max(size - 1, 0), bool(done))
+            for gid, gname, sid, sname, deadline, n_given, size, done in rows]
+
+
+def _lecturer_rows(lecturer_id):
+    group_count = select(func.count(Group.id)).where(Group.subject_id == Subject.id).scalar_subquery()
+    rows = db.session.execute(
+        select(Subject.id, Subject.name, Subject.term, Subject.archived_at, Setting.deadline, group_count)
+        .outerjoin(Setting, Setting.subject_id == Subject.id)
+        .where(Subject.lecturer_id == lecturer_id)
+        .order_by(Subject.name)
+    )
+    return [LecturerSubject(*row) for row in rows]
+
+
+def get_dashboard(user):
+    """Cached dashboard rows of ``user`` (StudentGroup or LecturerSubject tuples)."""
+    entry = _cache.get(user.id)
+    ttl = current_app.config.get("DASHBOARD_CACHE_TTL", 30)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+
+    if user.role == "lecturer":
+        rows, group_ids = _lecturer_rows(user.id), frozenset()
+    else:
+        rows = _student_rows(user.id)
+        group_ids = frozenset(r.group_id for r in rows)
+    # Content hash, so every worker derives the same ETag for the same data
+    version = hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()
+    dashboard = Dashboard(version, rows, group_ids)
+    _cache.set(user.id, (time.monotonic(), dashboard))
+    return dashboard
+
+
+def dashboard_version(user):
+    """Page version of /dashboard: the cached rows plus the user fields the page header renders."""
+    return f"{get_dashboard(user).version}|{user.first_name}|{user.last_name}|{user.gender}"
+
+
+# ---------------- INVALIDATION ---------------- #
+def invalidate(user_id=None, group_id=None):
+    if user_id is None and group_id is None:
+        _cache.clear()
+        return
+    if user_id is not None:
+        _cache.pop(int(user_id))
+    if group_id is not None:
+        # Group size changed: everyone's "reviews required" in that group moves
+        group_id = int(group_id)
+        for uid, (_, dashboard) in _cache.items():
+            if group_id in dashboard.group_ids:
+                _cache.pop(uid)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, PeerReview):
+            invalidate(user_id=obj.reviewer_id)
+        elif isinstance(obj, SelfAssessment):
+            invalidate(user_id=obj.user_id)
+        elif isinstance(obj, GroupMember):
+            invalidate(user_id=obj.id_number, group_id=obj.group_id)
+        elif isinstance(obj, (Subject, Group, Setting)):
+            invalidate()
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    # Set-based deletes cascade and archiving updates subjects; both are rare
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        invalidate()
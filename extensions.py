@@ -0,0 +1,13 @@
+from flask_login import LoginManager
+from sqlalchemy.orm import lazyload
+
+from models import db, User
+
+login_manager = LoginManager()
+login_manager.login_view = "auth.login"
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    # The selectin relationships would pull a lecturer's whole subject tree on every request
+    return db.session.get(User, int(user_id), options=[lazyload("*")])
@@ -0,0 +1,157 @@
+"""Per-subject gradebook: one aggregated query, streamed as CSV or Arrow/Parquet.
+
+Parquet and Arrow output need the optional ``pyarrow`` package.
+"""
+import csv
+import io
+
+from sqlalchemy import and_, func, select
+
+from grading import final_mark
+from models import db, User, Subject, Group, GroupMember, MarkSnapshot, review_tables
+
+COLUMNS = ["student_id", "id_number", "first_name", "last_name", "group_id", "group", "reviews_received",
+           "avg_peer_score", "final_mark", "marks_version", "reviews_given", "reviews_required",
+           "self_assessment", "completed"]
+
+BATCH_SIZE = 1000
+
+
+def gradebook_query(subject_id):
+    """One row per (student, group) of the subject, with every aggregate joined in."""
+    group_ids = select(Group.id).where(Group.subject_id == subject_id)
+    archived_at = db.session.query(Subject.archived_at).filter(Subject.id == subject_id).scalar()
+    tables = review_tables(archived_at)  # archived subjects read from the archive tables
+    peer, assessment = tables.peer_review, tables.self_assessment
+
+    received = (
+        select(peer.group_id, peer.reviewee_id.label("student_id"),
+               func.count(peer.id).label("n"), func.avg(peer.score).label("avg"))
+        .where(peer.group_id.in_(group_ids))
+        .group_by(peer.group_id, peer.reviewee_id)
+        .subquery()
+    )
+    given = (
+        select(peer.group_id, peer.reviewer_id.label("student_id"), func.count(peer.id).label("n"))
+        .where(peer.group_id.in_(group_ids))
+        .group_by(peer.group_id, peer.reviewer_id)
+        .subquery()
+    )
+    group_size = (
+        select(GroupMember.group_id, func.count(GroupMember.id).label("n"))
+        .join(User, User.id == GroupMember.id_number)
+        .where(GroupMember.group_id.in_(group_ids), User.role == "student")
+        .group_by(GroupMember.group_id)
+        .subquery()
+    )
+    assessed = (
+        select(assessment.group_id, assessment.user_id.label("student_id"))
+        .where(assessment.group_id.in_(group_ids))
+        .distinct()
+        .subquery()
+    )
+    latest_version = (
+        select(func.max(MarkSnapshot.version)).where(MarkSnapshot.subject_id == subject_id).scalar_subquery()
+    )
+
+    return (
+        select(
+            User.id, User.id_number, User.first_name, User.last_name, Group.id, Group.name,
+            func.coalesce(received.c.n, 0), received.c.avg,
+            MarkSnapshot.avg_score, MarkSnapshot.final_mark, MarkSnapshot.version,
+            func.coalesce(given.c.n, 0), group_size.c.n, assessed.c.student_id,
+        )
+        .select_from(GroupMember)
+        .join(User, User.id == GroupMember.id_number)
+        .join(Group, Group.id == GroupMember.group_id)
+        .join(group_size, group_size.c.group_id == Group.id)
+        .outerjoin(received, and_(received.c.group_id == Group.id, received.c.student_id == User.id))
+        .outerjoin(given, and_(given.c.group_id == Group.id, given.c.student_id == User.id))
+        .outerjoin(assessed, and_(assessed.c.group_id == Group.id, assessed.c.student_id == User.id))
+        .outerjoin(MarkSnapshot, and_(MarkSnapshot.subject_id == subject_id, MarkSnapshot.version == latest_version,
+                                      MarkSnapshot.group_id == Group.id, MarkSnapshot.student_id == User.id))
+        .where(Group.subject_id == subject_id, User.role == "student")
+        .order_by(Group.name, User.last_name, User.first_name, User.id)
+    )
+
+
+def iter_rows(subject_id):
+    """Yield gradebook rows as tuples in COLUMNS order, streaming from the database."""
+    result = db.session.execute(gradebook_query(subject_id).execution_options(yield_per=BATCH_SIZE))
+    for (student_id, id_number, first_name, last_name, group_id, group_name, n_received, live_avg,
+         frozen_avg, frozen_mark, version, n_given, size, assessed) in result:
+        if version is not None:
+            avg, mark = frozen_avg, frozen_mark
+        elif live_avg is not None:
+            avg = round(float(live_avg), 4)
+            mark = final_mark(float(live_avg))
+        else:
+            avg = mark = None
+        required = size - 1
+        has_assessment = assessed is not None
+        yield (student_id, id_number, first_name, last_name, group_id, group_name, n_received, avg, mark,
+               version, n_given, required, has_assessment, n_given >= required and has_assessment)
+
+
+def stream_csv(subject_id):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for i, row in enumerate(iter_rows(subject_id), 1):
+        writer.writerow(row)
+        if i % BATCH_SIZE == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _arrow_schema(pa):
+    return pa.schema([
+        ("student_id", pa.int64()), ("id_number", pa.string()), ("first_name", pa.string()),
+        ("last_name", pa.string()), ("group_id", pa.int64()), ("group", pa.string()),
+        ("reviews_received", pa.int64()), ("avg_peer_score", pa.float64()), ("final_mark", pa.float64()),
+        ("marks_version", pa.int64()), ("reviews_given", pa.int64()), ("reviews_required", pa.int64()),
+        ("self_assessment", pa.bool_()), ("completed", pa.bool_()),
+    ])
+
+
+def _record_batches(pa, schema, subject_id):
+    rows = []
+    for row in iter_rows(subject_id):
+        rows.append(row)
+        if len(rows) == BATCH_SIZE:
+            yield pa.RecordBatch.from_arrays([pa.array(col, type=f.type) for col, f in zip(zip(*rows), schema)],
+                                             schema=schema)
+            rows = []
+    if rows:
+        yield pa.RecordBatch.from_arrays([pa.array(col, type=f.type) for col, f in zip(zip(*rows), schema)],
+                                         schema=schema)
+
+
+def stream_arrow(subject_id):
+    """Arrow IPC stream, one record batch at a time."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in _record_batches(pa, schema, subject_id):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def write_parquet(subject_id):
+    """Parquet needs its footer at the end, so this one is built in memory batch by batch."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _record_batches(pa, schema, subject_id):
+            writer.write_batch(batch)
+    return sink.getvalue()
@@ -0,0 +1,112 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Subject, Group, PeerReview, MarkSnapshot
+
+# Latest frozen marks of a subject: marks is {group_id: {student_id: {"avg_score", "final_mark"}}}
+Snapshot = namedtuple("Snapshot", "subject_id version frozen_at marks")
+
+# freeze_subject result when there are no marks to store (falsy, unlike a real version)
+NOTHING_TO_FREEZE = 0
+
+_snapshots = {}  # subject_id -> Snapshot, rows are immutable so only a newer version replaces one
+_lock = threading.Lock()
+
+
+def final_mark(avg_score):
+    return round(avg_score * 20, 2)
+
+
+def compute_final_marks(subject_id):
+    """Average peer score and final mark of every reviewed student of a subject, in one query."""
+    rows = (
+        db.session.query(PeerReview.group_id, PeerReview.reviewee_id, func.avg(PeerReview.score))
+        .join(Group, Group.id == PeerReview.group_id)
+        .filter(Group.subject_id == subject_id)
+        .group_by(PeerReview.group_id, PeerReview.reviewee_id)
+        .all()
+    )
+    marks = {}
+    for group_id, student_id, avg_score in rows:
+        avg_score = float(avg_score)
+        marks.setdefault(group_id, {})[student_id] = {"avg_score": avg_score, "final_mark": final_mark(avg_score)}
+    return marks
+
+
+def latest_version(subject_id):
+    """(version, frozen_at) of the newest snapshot of a subject, or (None, None)."""
+    row = (
+        db.session.query(MarkSnapshot.version, MarkSnapshot.created_at)
+        .filter(MarkSnapshot.subject_id == subject_id)
+        .order_by(MarkSnapshot.version.desc())
+        .first()
+    )
+    return (row.version, row.created_at) if row else (None, None)
+
+
+def freeze_subject(subject_id, unless_frozen_after=None):
+    """Compute all final marks of a subject in one pass and store them as a new snapshot version.
+
+    With ``unless_frozen_after``, nothing happens if a snapshot newer than that
+    time already exists (used when a deadline passes, possibly in several
+    workers at once). Returns the version, NOTHING_TO_FREEZE if the subject has
+    no reviewed students yet, or None if another snapshot got there first.
+    """
+    # The hot rows of an archived subject are gone, its last snapshot is final
+    if db.session.query(Subject.archived_at).filter(Subject.id == subject_id).scalar() is not None:
+        return None
+
+    version, frozen_at = latest_version(subject_id)
+    if unless_frozen_after is not None and frozen_at is not None and frozen_at >= unless_frozen_after:
+        return None
+
+    marks = compute_final_marks(subject_id)
+    if not marks:
+        # No rows would be stored, so the version number would never advance
+        return NOTHING_TO_FREEZE
+
+    version = (version or 0) + 1
+    now = datetime.utcnow()
+    db.session.add_all([
+        MarkSnapshot(subject_id=subject_id, group_id=group_id, student_id=student_id, version=version,
+                     avg_score=m["avg_score"], final_mark=m["final_mark"], created_at=now)
+        for group_id, students in marks.items()
+        for student_id, m in students.items()
+    ])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker froze the same version first
+        db.session.rollback()
+        return None
+
+    with _lock:
+        _snapshots[subject_id] = Snapshot(subject_id, version, now, marks)
+    return version
+
+
+def get_snapshot(subject_id):
+    """Latest frozen marks of a subject, or None if it was never frozen."""
+    version, frozen_at = latest_version(subject_id)
+    if version is None:
+        return None
+    cached = _snapshots.get(subject_id)
+    if cached is not None and cached.version == version:
+        return cached
+
+    marks = {}
+    rows = (
+        db.session.query(MarkSnapshot.group_id, MarkSnapshot.student_id, MarkSnapshot.avg_score, MarkSnapshot.final_mark)
+        .filter(MarkSnapshot.subject_id == subject_id, MarkSnapshot.version == version)
+        .all()
+    )
+    for group_id, student_id, avg_score, mark in rows:
+        marks.setdefault(group_id, {})[student_id] = {"avg_score": avg_score, "final_mark": mark}
+    snapshot = Snapshot(subject_id, version, frozen_at, marks)
+    with _lock:
+        _snapshots[subject_id] = snapshot
+    return snapshot
@@ -0,0 +1,52 @@
+from functools import wraps
+
+from flask import abort
+from flask_login import current_user
+from sqlalchemy import func, select
+
+from extensions import login_manager
+from models import db, PeerReview, SelfAssessment
+
+ALLOWED_EXT = {"csv"}
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXT
+
+def role_required(role):
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated_view(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return login_manager.unauthorized()
+            
+            if current_user.role != role:
+                abort(403)
+            
+            return fn(*args, **kwargs)
+        return decorated_view
+    return wrapper
+
+def get_completion_status(group_students, group_id, peer_review=PeerReview, self_assessment=SelfAssessment):
+    """Get completion status for students in a specific group (archived subjects pass the archive models)
+
+    Two queries for the whole group; self-assessments are only checked for
+    existence, their text columns are never read.
+    """
+    reviews_given = dict(
+        db.session.query(peer_review.reviewer_id, func.count(peer_review.id))
+        .filter(peer_review.group_id == group_id)
+        .group_by(peer_review.reviewer_id)
+    )
+    assessed = set(
+        db.session.scalars(select(self_assessment.user_id).where(self_assessment.group_id == group_id))
+    )
+    required_reviews = len(group_students) - 1
+    status = {}
+    for student_obj in group_students:
+        completed_reviews = reviews_given.get(student_obj.id, 0)
+        status[student_obj.id] = {
+            'reviews_count': completed_reviews,
+            'completed': completed_reviews >= required_reviews and student_obj.id in assessed
+        }
+    return status
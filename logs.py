@@ -0,0 +1,118 @@
+"""Process-wide logging: JSON lines through a background queue.
+
+Request threads only put records on a queue (``LogQueueHandler``); a
+``QueueListener`` thread serialises and writes them, so a slow stderr pipe or
+disk never stalls a worker. Every record carries the id of the request that
+logged it (``X-Request-ID`` from the proxy, or a generated one), which is
+also echoed back in the response headers.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def current_request_id():
+    return g.get("request_id") if has_request_context() else None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_FIELDS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    """Does the minimum in the calling thread; JSON encoding happens on the listener thread."""
+
+    def prepare(self, record):
+        # Arguments may be ORM objects bound to this thread's session: render them here
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = current_request_id()
+        return record
+
+
+_listener = None
+
+
+def _start_listener(handler, target):
+    global _listener
+    handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(handler.queue, target, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(level="INFO", json_lines=True, path=None):
+    """Route the root logger through a queue to stderr (or ``path``). Safe to call again."""
+    root = logging.getLogger()
+    if any(isinstance(h, LogQueueHandler) for h in root.handlers):
+        return
+    target = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+    target.setFormatter(JSONFormatter() if json_lines else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    handler = LogQueueHandler(None)
+    _start_listener(handler, target)
+
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    atexit.register(_stop_listener)
+    # The listener thread does not survive fork(): gunicorn workers start their own
+    os.register_at_fork(after_in_child=lambda: _start_listener(handler, target))
+
+
+def init_logging(app):
+    cfg = app.config
+    if cfg.get("LOG_CONFIGURE", True):
+        configure_logging(level=cfg.get("LOG_LEVEL", "INFO"), json_lines=cfg.get("LOG_JSON", True),
+                          path=cfg.get("LOG_FILE"))
+
+    @app.before_request
+    def _assign_request_id():
+        # Trust a proxy-supplied id only if it looks like one
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = incoming if 0 < len(incoming) <= 64 and incoming.isprintable() else uuid.uuid4().hex
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_requests = {}  # endpoint -> {"count", "total_ms", "max_ms", "errors"}
+_pool_waits = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+_disconnects = 0
+
+
+# ---------------- CONNECTION POOL ---------------- #
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with _lock:
+                _pool_waits["count"] += 1
+                _pool_waits["total_ms"] += waited
+                _pool_waits["max_ms"] = max(_pool_waits["max_ms"], waited)
+
+
+def configure_pool(app):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings. Call before db.init_app."""
+    cfg = app.config
+    options = dict(cfg.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    uri = cfg.get("SQLALCHEMY_DATABASE_URI") or ""
+
+    # In-memory SQLite needs its single shared connection, leave its pool alone
+    if uri and uri != "sqlite://" and ":memory:" not in uri:
+        options["poolclass"] = TimedQueuePool
+        for key, setting in (("pool_size", "DB_POOL_SIZE"), ("max_overflow", "DB_MAX_OVERFLOW"),
+                             ("pool_timeout", "DB_POOL_TIMEOUT")):
+            if cfg.get(setting) is not None:
+                options[key] = cfg[setting]
+
+    options["pool_recycle"] = cfg.get("DB_POOL_RECYCLE", 300)
+    # "ping" = SELECT 1 on every checkout, "event" = no ping; the first query on a dead
+    # connection fails and SQLAlchemy then invalidates the whole pool (see _on_handle_error)
+    options["pool_pre_ping"] = cfg.get("DB_DISCONNECT_HANDLING", "ping") == "ping"
+    cfg["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def _on_handle_error(context):
+    """Count disconnects for /metrics.
+
+    SQLAlchemy already invalidates the pool on a disconnect error, so the
+    request that hit the dead connection fails and later checkouts reconnect.
+    """
+    global _disconnects
+    if context.is_disconnect:
+        with _lock:
+            _disconnects += 1
+        logger.warning("Database disconnect detected: %s", context.original_exception)
+
+
+def pool_stats(engines):
+    stats = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        entry = {"class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(size=pool.size(), checked_in=pool.checkedin(),
+                         checked_out=pool.checkedout(), overflow=pool.overflow())
+        stats[name or "default"] = entry
+    with _lock:
+        waits = dict(_pool_waits)
+        stats["checkout_wait"] = {
+            "count": waits["count"],
+            "avg_ms": round(waits["total_ms"] / waits["count"], 3) if waits["count"] else 0.0,
+            "max_ms": round(waits["max_ms"], 3),
+        }
+        stats["disconnects"] = _disconnects
+    return stats
+
+
+# ---------------- REQUESTS ---------------- #
+def request_stats():
+    with _lock:
+        return {
+            endpoint: {
+                "count": s["count"],
+                "errors": s["errors"],
+                "avg_ms": round(s["total_ms"] / s["count"], 3),
+                "max_ms": round(s["max_ms"], 3),
+            }
+            for endpoint, s in _requests.items()
+        }
+
+
+def snapshot(db):
+    return {"pid": os.getpid(), "requests": request_stats(), "pool": pool_stats(db.engines)}
+
+
+def init_metrics(app, db):
+    """Register request timing hooks and pool events. Call after db.init_app."""
+    if app.config.get("DB_DISCONNECT_HANDLING", "ping") == "event":
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "handle_error", _on_handle_error)
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get("request_started")
+        if started is not None:
+            elapsed = (time.perf_counter() - started) * 1000
+            endpoint = request.endpoint or "<unmatched>"
+            with _lock:
+                s = _requests.setdefault(endpoint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+                s["count"] += 1
+                s["total_ms"] += elapsed
+                s["max_ms"] = max(s["max_ms"], elapsed)
+                if response.status_code >= 500:
+                    s["errors"] += 1
+        return response
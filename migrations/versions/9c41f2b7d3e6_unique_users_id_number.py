@@ -0,0 +1,43 @@
+"""unique users.id_number
+
+Revision ID: 9c41f2b7d3e6
+Revises: 5d2e8a41c7b9
+Create Date: 2026-10-19 18:31:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c41f2b7d3e6'
+down_revision = '5d2e8a41c7b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicates from concurrent sign-ups and imports have to be resolved by hand first
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT id_number, id, email FROM users WHERE id_number IN "
+        "(SELECT id_number FROM users WHERE id_number IS NOT NULL GROUP BY id_number HAVING COUNT(*) > 1) "
+        "ORDER BY id_number, id"
+    )).all()
+    if duplicates:
+        accounts = "\n".join(f"  id_number={n!r}: user id={uid} email={email}" for n, uid, email in duplicates)
+        raise RuntimeError(
+            "users.id_number has duplicates; give each account its own ID number (or NULL) and rerun "
+            f"the upgrade:\n{accounts}"
+        )
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id_number'))
+        batch_op.create_index('uq_users_id_number', ['id_number'], unique=True,
+                              postgresql_where=sa.text('id_number IS NOT NULL'),
+                              sqlite_where=sa.text('id_number IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('uq_users_id_number')
+        batch_op.create_index(batch_op.f('ix_users_id_number'), ['id_number'], unique=False)
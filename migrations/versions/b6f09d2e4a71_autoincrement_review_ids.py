@@ -0,0 +1,41 @@
+"""never reuse review ids on sqlite
+
+Revision ID: b6f09d2e4a71
+Revises: e7a3c1d58f20
+Create Date: 2026-10-19 19:40:18.275306
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f09d2e4a71'
+down_revision = 'e7a3c1d58f20'
+branch_labels = None
+depends_on = None
+
+# Archived rows keep their hot-table ids (archive.py); PostgreSQL sequences never hand them out again
+TABLES = [("peer_reviews", "archived_peer_reviews"), ("self_assessments", "archived_self_assessments"),
+          ("anonymous_reviews", "archived_anonymous_reviews")]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, archived in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # Start after the highest id ever used, including the ones that now only live in the archive
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', "
+            f"max(coalesce((SELECT max(id) FROM {table}), 0), coalesce((SELECT max(id) FROM {archived}), 0))"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, _ in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
@@ -0,0 +1,25 @@
+"""unlink anonymous search documents from their authors
+
+Revision ID: e7a3c1d58f20
+Revises: 9c41f2b7d3e6
+Create Date: 2026-10-19 19:12:44.630172
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c1d58f20'
+down_revision = '9c41f2b7d3e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # anonymous_reviews.reviewee_id holds the author; their documents must not name anyone
+    if op.get_bind().dialect.name in ('sqlite', 'postgresql'):
+        op.execute("UPDATE review_search SET reviewee_id = NULL WHERE kind = 'anonymous'")
+
+
+def downgrade():
+    pass
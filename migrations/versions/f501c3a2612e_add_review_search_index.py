@@ -0,0 +1,63 @@
+"""add review full-text search index
+
+Revision ID: f501c3a2612e
+Revises: 134abc048cbc
+Create Date: 2026-10-19 14:20:31.906114
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f501c3a2612e'
+down_revision = '134abc048cbc'
+branch_labels = None
+depends_on = None
+
+# Hot and archived rows share ids per kind, see archive.py
+BACKFILL = [
+    "INSERT INTO review_search (kind, source_id, group_id, author_id, reviewee_id, body) "
+    "SELECT 'peer', id, group_id, reviewer_id, reviewee_id, comment FROM {table} "
+    "WHERE comment IS NOT NULL AND trim(comment) <> ''",
+    "INSERT INTO review_search (kind, source_id, group_id, author_id, reviewee_id, body) "
+    "SELECT 'anonymous', id, group_id, NULL, NULL, comment FROM {table} "
+    "WHERE comment IS NOT NULL AND trim(comment) <> ''",
+    "INSERT INTO review_search (kind, source_id, group_id, author_id, reviewee_id, body) "
+    "SELECT 'self', id, group_id, user_id, NULL, "
+    "summary || char(10) || challenges || char(10) || different || char(10) || role "
+    "|| coalesce(char(10) || nullif(feedback, ''), '') FROM {table}",
+]
+TABLES = [("peer_reviews", "archived_peer_reviews"), ("anonymous_reviews", "archived_anonymous_reviews"),
+          ("self_assessments", "archived_self_assessments")]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE review_search USING fts5("
+            "body, kind UNINDEXED, source_id UNINDEXED, group_id UNINDEXED, author_id UNINDEXED, "
+            "reviewee_id UNINDEXED, tokenize='porter unicode61')"
+        )
+    elif bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE review_search ("
+            "kind VARCHAR(10) NOT NULL, source_id INTEGER NOT NULL, group_id INTEGER, author_id INTEGER, "
+            "reviewee_id INTEGER, body TEXT NOT NULL, "
+            "document TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', body)) STORED, "
+            "PRIMARY KEY (kind, source_id))"
+        )
+        op.execute("CREATE INDEX ix_review_search_document ON review_search USING GIN (document)")
+        op.execute("CREATE INDEX ix_review_search_group_id ON review_search (group_id)")
+    else:
+        return
+
+    for statement, tables in zip(BACKFILL, TABLES):
+        if bind.dialect.name == 'postgresql':
+            statement = statement.replace("char(10)", "chr(10)")
+        for table in tables:
+            op.execute(statement.format(table=table))
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS review_search")
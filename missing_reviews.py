@@ -0,0 +1,72 @@
+"""Outstanding peer reviews of a subject: every reviewer -> reviewee pair with no review yet.
+
+One set-based query: the member x member pairs of each group, minus the pairs
+that have a ``PeerReview`` row (an anti-join on the
+``ix_peer_reviews_group_pair`` index).
+"""
+import csv
+import io
+from collections import namedtuple
+from itertools import groupby
+
+from sqlalchemy import and_, exists, select
+from sqlalchemy.orm import aliased
+
+from models import db, User, Subject, Group, GroupMember, review_tables
+
+COLUMNS = ["group_id", "group", "reviewer_id", "reviewer_id_number", "reviewer", "reviewee_id", "reviewee"]
+
+BATCH_SIZE = 1000
+
+Outstanding = namedtuple("Outstanding", "group_name reviewer reviewer_id_number reviewees")
+
+
+def missing_reviews_query(subject_id):
+    archived_at = db.session.query(Subject.archived_at).filter(Subject.id == subject_id).scalar()
+    peer = review_tables(archived_at).peer_review
+    reviewer_m, reviewee_m = aliased(GroupMember), aliased(GroupMember)
+    reviewer, reviewee = aliased(User), aliased(User)
+
+    reviewed = exists().where(peer.group_id == reviewer_m.group_id, peer.reviewer_id == reviewer_m.id_number,
+                              peer.reviewee_id == reviewee_m.id_number)
+    return (
+        select(Group.id, Group.name, reviewer.id, reviewer.id_number,
+               reviewer.first_name + " " + reviewer.last_name,
+               reviewee.id, reviewee.first_name + " " + reviewee.last_name)
+        .select_from(reviewer_m)
+        .join(Group, Group.id == reviewer_m.group_id)
+        .join(reviewee_m, and_(reviewee_m.group_id == reviewer_m.group_id,
+                               reviewee_m.id_number != reviewer_m.id_number))
+        .join(reviewer, reviewer.id == reviewer_m.id_number)
+        .join(reviewee, reviewee.id == reviewee_m.id_number)
+        .where(Group.subject_id == subject_id, reviewer.role == "student", reviewee.role == "student", ~reviewed)
+        .order_by(Group.name, reviewer.last_name, reviewer.first_name, reviewer.id,
+                  reviewee.last_name, reviewee.first_name, reviewee.id)
+    )
+
+
+def iter_rows(subject_id):
+    """Yield missing pairs as tuples in COLUMNS order, streaming from the database."""
+    yield from db.session.execute(missing_reviews_query(subject_id).execution_options(yield_per=BATCH_SIZE))
+
+
+def by_reviewer(subject_id):
+    """Missing pairs folded to one Outstanding row per (group, reviewer), for the HTML report."""
+    rows = iter_rows(subject_id)
+    return [
+        Outstanding(group_name, reviewer, id_number, [r[6] for r in pairs])
+        for (_, group_name, _, id_number, reviewer), pairs in groupby(rows, key=lambda r: r[:5])
+    ]
+
+
+def stream_csv(subject_id):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for i, row in enumerate(iter_rows(subject_id), 1):
+        writer.writerow(row)
+        if i % BATCH_SIZE == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
@@ -1,16 +1,86 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import UserMixin
+from collections import namedtuple
 from datetime import datetime
-from sqlalchemy import text
+import base64
+import sqlite3
+import zlib
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import Text, TypeDecorator
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Send reads to the ``replica`` bind when the current request asked for it.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    See replica.py for how a request opts in.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get("use_replica")):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+# Child rows are removed by the database through ondelete="CASCADE" (see the
+# passive_deletes relationships below); SQLite only honours that per connection.
+@event.listens_for(Engine, "connect")
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class CompressedText(TypeDecorator):
+    """Text that is stored zlib-compressed (base64 behind MARKER) once it reaches ``min_length`` characters.
+
+    Reads accept both forms, so rows written before compression was enabled
+    or with another threshold stay readable. ``min_length`` comes from
+    TEXT_COMPRESSION_MIN_LENGTH; 0 stores everything as plain text.
+    """
+    impl = Text
+    cache_ok = True
+
+    MARKER = "\x1bz:"
+    min_length = 1024
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # Plain text that happens to start with the marker is always packed, so reads are unambiguous
+        forced = value.startswith(self.MARKER)
+        if forced or (self.min_length and len(value) >= self.min_length):
+            packed = self.MARKER + base64.b64encode(zlib.compress(value.encode("utf-8"))).decode("ascii")
+            if forced or len(packed) < len(value):
+                return packed
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None or not value.startswith(self.MARKER):
+            return value
+        return zlib.decompress(base64.b64decode(value[len(self.MARKER):])).decode("utf-8")
 
-db = SQLAlchemy()
 
 # ---------------- USERS ---------------- #
 class User(UserMixin, db.Model):
     __tablename__ = "users"
 
     id = db.Column(db.Integer, primary_key=True)
-    id_number = db.Column(db.String(64), nullable=True, unique=False)  # optional, only for students
+    id_number = db.Column(db.String(64), nullable=True)  # optional, only for students; unique when set
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -23,9 +93,16 @@ class User(UserMixin, db.Model):
 
     # Relationships
     subjects = db.relationship("Subject", backref="lecturer", lazy="selectin")  # was teacher
-    memberships = db.relationship("GroupMember", backref="student_user", lazy="selectin")  # if student
-    given_reviews = db.relationship("PeerReview", foreign_keys="PeerReview.reviewer_id", backref="reviewer_user")
-    received_reviews = db.relationship("PeerReview", foreign_keys="PeerReview.reviewee_id", backref="reviewee_user")
+    memberships = db.relationship("GroupMember", backref="student_user", lazy="selectin", passive_deletes=True)  # if student
+    given_reviews = db.relationship("PeerReview", foreign_keys="PeerReview.reviewer_id", backref="reviewer_user",
+                                    passive_deletes=True)
+    received_reviews = db.relationship("PeerReview", foreign_keys="PeerReview.reviewee_id", backref="reviewee_user",
+                                       passive_deletes=True)
+
+    __table_args__ = (
+        db.Index("uq_users_id_number", "id_number", unique=True,
+                 postgresql_where=text("id_number IS NOT NULL"), sqlite_where=text("id_number IS NOT NULL")),
+    )
 
     def __repr__(self):
         return f"<User id={self.id} username={self.username} role={self.role} id_number={self.id_number}>"
@@ -41,8 +118,12 @@ class Subject(db.Model):
 
     lecturer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
-    groups = db.relationship("Group", backref="subject", cascade="all, delete", lazy="selectin")
-    settings = db.relationship("Setting", backref="subject", uselist=False, cascade="all, delete")
+    term = db.Column(db.String(20), nullable=True)  # e.g. "2025-T1"
+    archived_at = db.Column(db.DateTime, nullable=True)  # reviews moved to the archive tables, read-only
+
+    groups = db.relationship("Group", backref="subject", cascade="all, delete", lazy="selectin", passive_deletes=True)
+    settings = db.relationship("Setting", backref="subject", uselist=False, cascade="all, delete",
+                               passive_deletes=True)
 
     def __repr__(self):
         return f"<Subject id={self.id} name={self.name!r}>"
@@ -55,8 +136,10 @@ class Group(db.Model):
     name = db.Column(db.String(120), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
 
-    members = db.relationship("GroupMember", backref="group", cascade="all, delete", lazy="selectin")
-    reviews = db.relationship("PeerReview", backref="group", cascade="all, delete", lazy="selectin")
+    members = db.relationship("GroupMember", backref="group", cascade="all, delete", lazy="selectin",
+                              passive_deletes=True)
+    reviews = db.relationship("PeerReview", backref="group", cascade="all, delete", lazy="selectin",
+                              passive_deletes=True)
 
     __table_args__ = (
         db.UniqueConstraint("name", "subject_id", name="uq_group_name_per_subject"),
@@ -74,6 +157,11 @@ class GroupMember(db.Model):
     id_number = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Group rosters and the member x member pairs of the missing-reviews report
+        db.Index("ix_group_members_group_id_id_number", "group_id", "id_number"),
+    )
+
     def __repr__(self):
         return f"<GroupMember group_id={self.group_id} student_id={self.student_id}>"
 
@@ -93,6 +181,12 @@ class PeerReview(db.Model):
 
     __table_args__ = (
         db.CheckConstraint("reviewer_id <> reviewee_id", name="ck_review_not_self"),
+        # Keyset pagination of the /reviews feed (newest first)
+        db.Index("ix_peer_reviews_created_at_id", "created_at", "id"),
+        # "Has this reviewer reviewed this reviewee in this group?" (missing-reviews report)
+        db.Index("ix_peer_reviews_group_pair", "group_id", "reviewer_id", "reviewee_id"),
+        # Archived rows keep their ids, so SQLite must never hand a freed id to a new review
+        {"sqlite_autoincrement": True},
     )
 
     def __repr__(self):
@@ -106,22 +200,25 @@ class SelfAssessment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete="CASCADE"), nullable=True)
 
-    summary = db.Column(db.Text, nullable=False)
-    challenges = db.Column(db.Text, nullable=False)
-    different = db.Column(db.Text, nullable=False)
-    role = db.Column(db.Text, nullable=False)
-    feedback = db.Column(db.Text, nullable=True)
+    # Loaded together on first access or with undefer_group("text"); existence and
+    # completion checks never read them
+    summary = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    challenges = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    different = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    role = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    feedback = db.deferred(db.Column(CompressedText, nullable=True), group="text")
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Self-assessments are edited in place; page version keys (cache.py) stamp this column
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user = db.relationship("User", backref="self_assessments")
-    group = db.relationship("Group", backref="self_assessments")
+    user = db.relationship("User", backref=db.backref("self_assessments", passive_deletes=True))
+    group = db.relationship("Group", backref=db.backref("self_assessments", passive_deletes=True))
 
-    def __repr__(self):
-        return f"<SelfAssessment id={self.id} user_id={self.user_id}>"
+    __table_args__ = {"sqlite_autoincrement": True}  # see PeerReview
 
     def __repr__(self):
-        return f"<SelfAssessment id={self.id} user_id={self.user_id} score={self.score}>"
+        return f"<SelfAssessment id={self.id} user_id={self.user_id}>"
 
 class AnonymousReview(db.Model):
     __tablename__ = "anonymous_reviews"
@@ -132,13 +229,126 @@ class AnonymousReview(db.Model):
     comment = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    reviewee = db.relationship("User", backref="anonymous_reviews")
-    group = db.relationship("Group", backref="anonymous_reviews")
+    reviewee = db.relationship("User", backref=db.backref("anonymous_reviews", passive_deletes=True))
+    group = db.relationship("Group", backref=db.backref("anonymous_reviews", passive_deletes=True))
+
+    __table_args__ = {"sqlite_autoincrement": True}  # see PeerReview
 
     def __repr__(self):
         return f"<AnonymousReview id={self.id} reviewee_id={self.reviewee_id}>"
 
 
+# ---------------- ARCHIVE (closed terms, see archive.py) ---------------- #
+# Same columns and ids as the hot tables plus subject_id; rows are only ever inserted by archive.py
+class ArchivedPeerReview(db.Model):
+    __tablename__ = "archived_peer_reviews"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False, index=True)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    reviewee_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime)
+
+    reviewer_user = db.relationship("User", foreign_keys=[reviewer_id])
+
+    def __repr__(self):
+        return f"<ArchivedPeerReview id={self.id} subject_id={self.subject_id} score={self.score}>"
+
+
+class ArchivedSelfAssessment(db.Model):
+    __tablename__ = "archived_self_assessments"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete="CASCADE"), nullable=True, index=True)
+    summary = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    challenges = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    different = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    role = db.deferred(db.Column(CompressedText, nullable=False), group="text")
+    feedback = db.deferred(db.Column(CompressedText, nullable=True), group="text")
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<ArchivedSelfAssessment id={self.id} subject_id={self.subject_id} user_id={self.user_id}>"
+
+
+class ArchivedAnonymousReview(db.Model):
+    __tablename__ = "archived_anonymous_reviews"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False, index=True)
+    reviewee_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete="CASCADE"), nullable=True, index=True)
+    comment = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<ArchivedAnonymousReview id={self.id} subject_id={self.subject_id}>"
+
+
+ReviewTables = namedtuple("ReviewTables", "peer_review self_assessment anonymous_review")
+
+HOT = ReviewTables(PeerReview, SelfAssessment, AnonymousReview)
+ARCHIVED = ReviewTables(ArchivedPeerReview, ArchivedSelfAssessment, ArchivedAnonymousReview)
+
+
+def review_tables(archived):
+    """Models holding a subject's review rows; pass ``subject.archived_at``."""
+    return ARCHIVED if archived else HOT
+
+
+# ---------------- FROZEN MARKS ---------------- #
+class MarkSnapshot(db.Model):
+    """Final mark of one student, frozen per subject. Rows are never updated; refreezing adds a new version."""
+    __tablename__ = "mark_snapshots"
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+
+    avg_score = db.Column(db.Float, nullable=False)
+    final_mark = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("subject_id", "version", "group_id", "student_id", name="uq_mark_snapshot_entry"),
+    )
+
+    def __repr__(self):
+        return f"<MarkSnapshot subject_id={self.subject_id} v{self.version} student_id={self.student_id} final_mark={self.final_mark}>"
+
+
+@event.listens_for(MarkSnapshot, "before_update")
+def _mark_snapshots_are_immutable(mapper, connection, target):
+    raise ValueError("Mark snapshots are immutable; freeze a new version instead")
+
+
+# ---------------- REMINDERS (see reminders.py) ---------------- #
+class ReminderLog(db.Model):
+    """One row per student, subject and day a reminder went out; keeps reruns from sending twice."""
+    __tablename__ = "reminder_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+    sent_on = db.Column(db.Date, nullable=False)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "subject_id", "sent_on", name="uq_reminder_per_subject_day"),
+    )
+
+    def __repr__(self):
+        return f"<ReminderLog user_id={self.user_id} subject_id={self.subject_id} sent_on={self.sent_on}>"
+
+
 # ---------------- SETTINGS (per subject) ---------------- #
 class Setting(db.Model):
     __tablename__ = "settings"
@@ -148,6 +358,7 @@ class Setting(db.Model):
 
     criteria = db.Column(db.String(255), default="Collaboration, Contribution, Communication")
     max_score = db.Column(db.Integer, default=10)
+    opens_at = db.Column(db.DateTime, nullable=True)  # review window; open until deadline
     deadline = db.Column(db.DateTime, nullable=True)
 
     def __repr__(self):
@@ -0,0 +1,175 @@
+"""Opt-in per-request profiling (PROFILING_ENABLED).
+
+A request is profiled when it is picked at PROFILE_SAMPLE_RATE, or, if
+PROFILE_SLOW_MS is set, every request is watched by the stack sampler and
+kept only when it ran at least that long. Profiles go to PROFILE_DIR, named
+``<time>-<endpoint>-<ms>ms-<queries>q-<pid>``:
+
+* ``.folded`` -- collapsed stacks from the sampler thread ("sample" mode),
+  readable by flamegraph.pl, speedscope or inferno;
+* ``.prof`` -- a cProfile dump ("cprofile" mode, rate-sampled requests only),
+  readable by snakeviz or ``python -m pstats``.
+
+When disabled no hooks or listeners are installed at all.
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+# ---------------- STACK SAMPLER ---------------- #
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """One daemon thread that samples the stacks of the threads currently being profiled."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._stacks = {}  # thread id -> Counter of "root;...;leaf" strings
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._stacks[thread_id] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._stacks.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                watched = list(self._stacks)
+                if not watched:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            for thread_id in watched:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack = ";".join(reversed(labels))
+                with self._lock:
+                    counts = self._stacks.get(thread_id)
+                    if counts is not None:
+                        counts[stack] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+# ---------------- REQUEST HOOKS ---------------- #
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    profile = g.get("profile") if g else None
+    if profile is not None:
+        profile["queries"] += 1
+
+
+def _write(directory, stem, suffix, write):
+    path = os.path.join(directory, stem + suffix)
+    try:
+        write(path)
+    except OSError:
+        logger.exception("Could not write profile %s", path)
+        return None
+    return path
+
+
+def init_profiling(app):
+    cfg = app.config
+    if not cfg.get("PROFILING_ENABLED"):
+        return
+
+    directory = cfg.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    rate = cfg.get("PROFILE_SAMPLE_RATE", 0.01)
+    slow_ms = cfg.get("PROFILE_SLOW_MS")
+    mode = cfg.get("PROFILE_MODE", "sample")
+    max_files = cfg.get("PROFILE_MAX_FILES", 500)
+    sampler = StackSampler(interval=cfg.get("PROFILE_INTERVAL_MS", 5) / 1000)
+    written = [0]
+
+    event.listen(Engine, "before_cursor_execute", _count_query)
+
+    @app.before_request
+    def _start_profile():
+        picked = random.random() < rate
+        if (not picked and slow_ms is None) or written[0] >= max_files:
+            return
+        profile = g.profile = {"picked": picked, "queries": 0, "started": time.perf_counter(),
+                               "thread": threading.get_ident(), "cprofile": None}
+        if picked and mode == "cprofile":
+            profile["cprofile"] = cProfile.Profile()
+            profile["cprofile"].enable()
+        else:
+            sampler.start(profile["thread"])
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        elapsed = (time.perf_counter() - profile["started"]) * 1000
+        if profile["cprofile"] is not None:
+            profile["cprofile"].disable()
+        else:
+            stacks = sampler.stop(profile["thread"])
+        if not profile["picked"] and elapsed < slow_ms:
+            return response
+
+        endpoint = _UNSAFE.sub("_", request.endpoint or "unmatched")
+        stem = (f"{datetime.now():%Y%m%dT%H%M%S.%f}-{endpoint}-{elapsed:.0f}ms-"
+                f"{profile['queries']}q-{os.getpid()}")
+        if profile["cprofile"] is not None:
+            path = _write(directory, stem, ".prof", profile["cprofile"].dump_stats)
+        elif stacks:
+            def write_folded(path):
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            path = _write(directory, stem, ".folded", write_folded)
+        else:
+            # Finished before the first sample
+            return response
+        if path:
+            written[0] += 1
+            logger.info("Profiled %s %s in %.0fms (%d queries): %s",
+                        request.method, request.path, elapsed, profile["queries"], path)
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request is skipped when a view raises; stop watching this thread anyway
+        profile = g.pop("profile", None)
+        if profile is not None:
+            if profile["cprofile"] is not None:
+                profile["cprofile"].disable()
+            else:
+                sampler.stop(profile["thread"])
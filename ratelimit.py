@@ -0,0 +1,163 @@
+"""Failed-login rate limiting, keyed by (username, client IP) and by client IP.
+
+The username bucket is per client IP, so an attacker hammering an account
+locks out only their own address: the real user still logs in from theirs.
+
+Counts use a sliding window approximated from two fixed windows: per key
+only (window number, failures this window, failures last window) is kept,
+so memory stays flat under a credential-stuffing burst. ``MemoryStore`` is
+per process; ``SQLiteStore`` shares the counts between workers through a
+small SQLite file (LOGIN_RATE_LIMIT_DB).
+"""
+import sqlite3
+import threading
+import time
+
+_PURGE_EVERY = 1024
+
+
+def _estimate(entry, window_no, fraction):
+    """Failures in the last ``window`` seconds from a (window_no, current, previous) entry."""
+    if entry is None:
+        return 0.0
+    entry_no, current, previous = entry
+    if entry_no == window_no:
+        return previous * (1 - fraction) + current
+    if entry_no == window_no - 1:
+        return current * (1 - fraction)
+    return 0.0
+
+
+class MemoryStore:
+    def __init__(self, window):
+        self.window = window
+        self._entries = {}  # key -> (window_no, current, previous)
+        self._lock = threading.Lock()
+        self._adds = 0
+
+    def count(self, key, now):
+        window_no, fraction = divmod(now / self.window, 1)
+        return _estimate(self._entries.get(key), int(window_no), fraction)
+
+    def add(self, key, now):
+        window_no = int(now // self.window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < window_no - 1:
+                entry = (window_no, 1, 0)
+            elif entry[0] == window_no - 1:
+                entry = (window_no, 1, entry[1])
+            else:
+                entry = (window_no, entry[1] + 1, entry[2])
+            self._entries[key] = entry
+
+            self._adds += 1
+            if self._adds % _PURGE_EVERY == 0:
+                self._entries = {k: e for k, e in self._entries.items() if e[0] >= window_no - 1}
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """Same counters in a SQLite file shared by every worker on the host."""
+
+    def __init__(self, path, window):
+        self.path = path
+        self.window = window
+        self._local = threading.local()
+        self._adds = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_failures ("
+                "key TEXT PRIMARY KEY, window_no INTEGER NOT NULL, current INTEGER NOT NULL, "
+                "previous INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+        return conn
+
+    def count(self, key, now):
+        window_no, fraction = divmod(now / self.window, 1)
+        row = self._connection().execute(
+            "SELECT window_no, current, previous FROM login_failures WHERE key = ?", (key,)
+        ).fetchone()
+        return _estimate(row, int(window_no), fraction)
+
+    def add(self, key, now):
+        window_no = int(now // self.window)
+        conn = self._connection()
+        # All SET expressions see the old row
+        conn.execute(
+            "INSERT INTO login_failures (key, window_no, current, previous) VALUES (?, ?, 1, 0) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "previous = CASE WHEN window_no = excluded.window_no THEN previous "
+            "WHEN window_no = excluded.window_no - 1 THEN current ELSE 0 END, "
+            "current = CASE WHEN window_no = excluded.window_no THEN current + 1 ELSE 1 END, "
+            "window_no = excluded.window_no",
+            (key, window_no),
+        )
+        self._adds += 1
+        if self._adds % _PURGE_EVERY == 0:
+            conn.execute("DELETE FROM login_failures WHERE window_no < ?", (window_no - 1,))
+
+    def reset(self, key):
+        self._connection().execute("DELETE FROM login_failures WHERE key = ?", (key,))
+
+
+class LoginLimiter:
+    """Blocks a username from one IP, or a whole IP, after too many failed logins within the window."""
+
+    def __init__(self, store, max_per_user=10, max_per_ip=50, enabled=True):
+        self.store = store
+        self.max_per_user = max_per_user
+        self.max_per_ip = max_per_ip
+        self.enabled = enabled
+
+    def _keys(self, username, ip):
+        return ((f"u:{(username or '').strip().lower()}|{ip}", self.max_per_user), (f"ip:{ip}", self.max_per_ip))
+
+    def blocked(self, username, ip, now=None):
+        """True if this attempt must be rejected without looking at the database."""
+        if not self.enabled:
+            return False
+        now = now or time.time()
+        return any(self.store.count(key, now) >= limit for key, limit in self._keys(username, ip))
+
+    def failed(self, username, ip, now=None):
+        if self.enabled:
+            now = now or time.time()
+            for key, _ in self._keys(username, ip):
+                self.store.add(key, now)
+
+    def succeeded(self, username, ip):
+        # Only this account's counter from this IP; the IP may be shared with an attacker
+        if self.enabled:
+            self.store.reset(self._keys(username, ip)[0][0])
+
+    @property
+    def window(self):
+        return self.store.window
+
+
+login_limiter = LoginLimiter(MemoryStore(window=300))
+
+
+def init_rate_limit(app):
+    global login_limiter
+    cfg = app.config
+    window = cfg.get("LOGIN_RATE_WINDOW", 300)
+    path = cfg.get("LOGIN_RATE_LIMIT_DB")
+    store = SQLiteStore(path, window) if path else MemoryStore(window)
+    login_limiter = LoginLimiter(store, max_per_user=cfg.get("LOGIN_MAX_FAILURES_PER_USER", 10),
+                                 max_per_ip=cfg.get("LOGIN_MAX_FAILURES_PER_IP", 50),
+                                 enabled=cfg.get("LOGIN_RATE_LIMIT_ENABLED", True))
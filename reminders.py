@@ -0,0 +1,202 @@
+"""Reminder emails for students who have not finished their peer reviews.
+
+``send_reminders`` finds every incomplete (student, group) of the open
+subjects in one query, folds them into one message per student, renders the
+messages with a single compiled template and hands them to the delivery
+backend a batch at a time. ``reminder_log`` records which subjects each
+student was reminded about today, so reruns (cron, the lecturer's button)
+never remind a student about the same subject twice on one day, while
+another lecturer's subject still gets its reminder.
+
+Backends have one method, ``send_batch(messages)``:
+
+* ``FileBackend`` appends JSON lines to REMINDER_FILE (development, tests);
+* ``SMTPBackend`` sends each batch over one SMTP connection.
+
+REMINDER_BACKEND may also be "package.module:Class", constructed with the app config.
+"""
+import importlib
+import json
+import smtplib
+from collections import namedtuple
+from datetime import datetime
+from email.message import EmailMessage
+from itertools import groupby
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, insert, or_, select
+
+from models import db, User, Subject, Group, GroupMember, PeerReview, SelfAssessment, Setting, ReminderLog
+
+TEMPLATE = "email/reminder.txt"
+BATCH_SIZE = 500
+
+Outstanding = namedtuple("Outstanding", "subject_id subject_name group_name deadline reviews_given reviews_required "
+                                        "self_assessed")
+Reminder = namedtuple("Reminder", "user_id to subject body subject_ids")
+Result = namedtuple("Result", "students sent skipped")
+
+
+# ---------------- DELIVERY BACKENDS ---------------- #
+class FileBackend:
+    def __init__(self, path):
+        self.path = path
+
+    def send_batch(self, messages):
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.writelines(json.dumps({"to": m.to, "subject": m.subject, "body": m.body}) + "\n" for m in messages)
+
+
+class SMTPBackend:
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True, sender=None, timeout=30):
+        self.host, self.port = host, port
+        self.username, self.password = username, password
+        self.use_tls = use_tls
+        self.sender = sender
+        self.timeout = timeout
+
+    def send_batch(self, messages):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for m in messages:
+                email = EmailMessage()
+                email["From"], email["To"], email["Subject"] = self.sender, m.to, m.subject
+                email.set_content(m.body)
+                smtp.send_message(email)
+
+
+def get_backend(app=None):
+    cfg = (app or current_app).config
+    name = cfg.get("REMINDER_BACKEND", "file")
+    if name == "file":
+        return FileBackend(cfg["REMINDER_FILE"])
+    if name == "smtp":
+        return SMTPBackend(cfg["SMTP_HOST"], cfg.get("SMTP_PORT", 587), cfg.get("SMTP_USERNAME"),
+                           cfg.get("SMTP_PASSWORD"), cfg.get("SMTP_USE_TLS", True), cfg.get("REMINDER_SENDER"))
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)(cfg)
+
+
+# ---------------- INCOMPLETE STUDENTS ---------------- #
+def incomplete_query(now, subject_id=None):
+    """(user, group) rows of open subjects where reviews or the self-assessment are missing, by user."""
+    open_groups = (
+        select(Group.id)
+        .join(Subject, Subject.id == Group.subject_id)
+        .outerjoin(Setting, Setting.subject_id == Subject.id)
+        .where(Subject.archived_at.is_(None),
+               or_(Setting.opens_at.is_(None), Setting.opens_at <= now),
+               or_(Setting.deadline.is_(None), Setting.deadline > now))
+    )
+    if subject_id:
+        open_groups = open_groups.where(Subject.id == subject_id)
+
+    group_size = (
+        select(GroupMember.group_id, func.count(GroupMember.id).label("n"))
+        .join(User, User.id == GroupMember.id_number)
+        .where(GroupMember.group_id.in_(open_groups), User.role == "student")
+        .group_by(GroupMember.group_id)
+        .subquery()
+    )
+    given = (
+        select(PeerReview.group_id, PeerReview.reviewer_id, func.count(PeerReview.id).label("n"))
+        .where(PeerReview.group_id.in_(open_groups))
+        .group_by(PeerReview.group_id, PeerReview.reviewer_id)
+        .subquery()
+    )
+    assessed = (
+        select(SelfAssessment.group_id, SelfAssessment.user_id)
+        .where(SelfAssessment.group_id.in_(open_groups))
+        .distinct()
+        .subquery()
+    )
+    n_given = func.coalesce(given.c.n, 0)
+    return (
+        select(User.id, User.email, User.first_name, Subject.id, Subject.name, Group.name, Setting.deadline,
+               n_given, group_size.c.n - 1, assessed.c.user_id.is_not(None))
+        .select_from(GroupMember)
+        .join(User, User.id == GroupMember.id_number)
+        .join(Group, Group.id == GroupMember.group_id)
+        .join(Subject, Subject.id == Group.subject_id)
+        .join(group_size, group_size.c.group_id == Group.id)
+        .outerjoin(Setting, Setting.subject_id == Subject.id)
+        .outerjoin(given, and_(given.c.group_id == Group.id, given.c.reviewer_id == User.id))
+        .outerjoin(assessed, and_(assessed.c.group_id == Group.id, assessed.c.user_id == User.id))
+        .where(User.role == "student", or_(n_given < group_size.c.n - 1, assessed.c.user_id.is_(None)))
+        .order_by(User.id, Setting.deadline, Subject.name, Group.name)
+    )
+
+
+def incomplete_students(now=None, subject_id=None):
+    """Yield (user_id, email, first_name, [Outstanding, ...]) per student, streaming from the database."""
+    rows = db.session.execute(incomplete_query(now or datetime.now(), subject_id)
+                              .execution_options(yield_per=BATCH_SIZE))
+    for (user_id, email, first_name), items in groupby(rows, key=lambda r: r[:3]):
+        yield user_id, email, first_name, [Outstanding(*r[3:]) for r in items]
+
+
+# ---------------- SENDING ---------------- #
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def send_reminders(backend, now=None, subject_id=None, batch_size=BATCH_SIZE, dry_run=False):
+    """Remind every incomplete student once per subject per day. Returns Result(students, sent, skipped).
+
+    ``skipped`` counts students whose outstanding subjects were all reminded about today already.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    template = current_app.jinja_env.get_template(TEMPLATE)
+    # Materialised so the reminder_log writes below don't interrupt the streaming cursor
+    students = [s for s in incomplete_students(now, subject_id) if s[1]]
+    sent = skipped = 0
+    for batch in _batches(students, batch_size):
+        already = set(db.session.execute(
+            select(ReminderLog.user_id, ReminderLog.subject_id)
+            .where(ReminderLog.sent_on == today, ReminderLog.user_id.in_([s[0] for s in batch]))
+        ).tuples())
+        messages = []
+        for user_id, email, first_name, outstanding in batch:
+            pending = [o for o in outstanding if (user_id, o.subject_id) not in already]
+            if pending:
+                messages.append(Reminder(user_id, email, "Peer review reminder",
+                                         template.render(first_name=first_name, outstanding=pending, now=now),
+                                         sorted({o.subject_id for o in pending})))
+        skipped += len(batch) - len(messages)
+        if not messages or dry_run:
+            continue
+        backend.send_batch(messages)
+        # Logged only after delivery: a failed batch is retried by the next run
+        db.session.execute(insert(ReminderLog), [
+            {"user_id": m.user_id, "subject_id": subject_id, "sent_on": today, "sent_at": datetime.utcnow()}
+            for m in messages for subject_id in m.subject_ids
+        ])
+        db.session.commit()
+        sent += len(messages)
+    return Result(len(students), sent, skipped)
+
+
+@click.command("send-reminders")
+@click.option("--subject-id", type=int, help="Only remind students of this subject.")
+@click.option("--batch-size", default=BATCH_SIZE, show_default=True, help="Messages handed to the backend at once.")
+@click.option("--dry-run", is_flag=True, help="Count who would be reminded without sending.")
+@with_appcontext
+def send_reminders_command(subject_id, batch_size, dry_run):
+    """Email every student who still has peer reviews or a self-assessment to do."""
+    result = send_reminders(get_backend(), subject_id=subject_id, batch_size=batch_size, dry_run=dry_run)
+    verb = "Would remind" if dry_run else "Reminded"
+    click.echo(f"{verb} {result.students - result.skipped} of {result.students} incomplete students "
+               f"({result.skipped} already reminded today).")
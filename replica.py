@@ -0,0 +1,47 @@
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import REPLICA_BIND
+
+
+def replica_enabled():
+    return REPLICA_BIND in (current_app.config.get("SQLALCHEMY_BINDS") or {})
+
+
+def read_replica(fn):
+    """Route the ORM reads of a reporting view to the read replica.
+
+    Users who wrote something in the last REPLICA_READ_YOUR_WRITES seconds
+    keep reading from the primary so they always see their own submission.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if replica_enabled() and time.time() >= session.get("primary_until", 0):
+            g.use_replica = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_write(db_session, flush_context):
+    if has_request_context() and (db_session.new or db_session.dirty or db_session.deleted):
+        g.db_wrote = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _remember_bulk_write(orm_execute_state):
+    # Set-based update()/delete() statements bypass the flush
+    if has_request_context() and (orm_execute_state.is_update or orm_execute_state.is_delete):
+        g.db_wrote = True
+
+
+def init_replica(app):
+    @app.after_request
+    def pin_to_primary(response):
+        if g.get("db_wrote") and replica_enabled():
+            session["primary_until"] = time.time() + current_app.config["REPLICA_READ_YOUR_WRITES"]
+        return response
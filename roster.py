@@ -0,0 +1,92 @@
+"""Cached group rosters: student ids and names, without loading ``User`` objects.
+
+A roster is a few tuples per group: members sorted by id (``ids`` as an
+``array`` for bisecting names, ``members`` as plain tuples for templates) and
+a frozenset for O(1) "is this student in the group?" checks. Rosters are
+dropped when memberships, users or groups change in this process, and expire
+after ROSTER_CACHE_TTL seconds so other workers' changes show up too.
+"""
+from array import array
+from bisect import bisect_left
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cache import LRUCache
+from models import db, User, Group, GroupMember
+
+
+class Member(namedtuple("Member", "id first_name last_name")):
+    __slots__ = ()
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+
+class Roster(namedtuple("Roster", "group_id subject_id ids members member_ids")):
+    __slots__ = ()
+
+    def member(self, student_id):
+        """The Member with this id, or None if the student is not in the group."""
+        if student_id not in self.member_ids:
+            return None
+        return self.members[bisect_left(self.ids, student_id)]
+
+    def name(self, student_id, default=None):
+        member = self.member(student_id)
+        return member.full_name if member else default
+
+
+_rosters = LRUCache(maxsize=4096)  # group_id -> (loaded_at, Roster)
+
+
+def get_roster(group_id):
+    """Students of a group ordered by id, cached until membership changes or the TTL passes."""
+    group_id = int(group_id)
+    entry = _rosters.get(group_id)
+    ttl = current_app.config.get("ROSTER_CACHE_TTL", 30)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+    rows = (
+        db.session.query(User.id, User.first_name, User.last_name)
+        .join(GroupMember, GroupMember.id_number == User.id)
+        .filter(GroupMember.group_id == group_id, User.role == "student")
+        .order_by(User.id)
+        .all()
+    )
+    subject_id = db.session.query(Group.subject_id).filter(Group.id == group_id).scalar()
+    members = tuple(Member(*row) for row in rows)
+    ids = array("q", (m.id for m in members))
+    roster = Roster(group_id, subject_id, ids, members, frozenset(ids))
+    _rosters.set(group_id, (time.monotonic(), roster))
+    return roster
+
+
+def invalidate_roster(group_id=None):
+    if group_id is None:
+        _rosters.clear()
+    else:
+        _rosters.pop(int(group_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_memberships(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, GroupMember):
+            invalidate_roster(obj.group_id)
+        elif isinstance(obj, User) and obj not in session.new:
+            # Renamed or deleted users can sit in any group
+            invalidate_roster()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_deletes(orm_execute_state):
+    # Set-based deletes cascade in the database, so any of these can empty a roster
+    if orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in (User, Group, GroupMember):
+            invalidate_roster()
@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from cache import get_settings, load_settings
+from grading import freeze_subject
+from models import db
+
+logger = logging.getLogger(__name__)
+
+NOT_OPEN, OPEN, CLOSED = "not_open", "open", "closed"
+
+_finalized = set()
+_thread_pid = None
+_start_lock = threading.Lock()
+
+
+def window_state(subject_id, now=None):
+    """Review window of a subject, from the in-memory settings cache (no query per call)."""
+    settings = get_settings(subject_id)
+    if settings is None:
+        return OPEN
+    now = now or datetime.now()
+    if settings.opens_at and now < settings.opens_at:
+        return NOT_OPEN
+    if settings.deadline and now >= settings.deadline:
+        return CLOSED
+    return OPEN
+
+
+def review_window_error(subject_id):
+    """User-facing message if submissions for the subject are not accepted right now, else None."""
+    state = window_state(subject_id)
+    if state == OPEN:
+        return None
+    settings = get_settings(subject_id)
+    if state == NOT_OPEN:
+        return f"Peer review for this subject opens on {settings.opens_at:%Y-%m-%d %H:%M}."
+    return f"The peer review deadline for this subject passed on {settings.deadline:%Y-%m-%d %H:%M}."
+
+
+def tick(now=None):
+    """Refresh the settings cache and freeze the marks of subjects whose deadline just passed."""
+    now = now or datetime.now()
+    for subject_id, settings in load_settings().items():
+        closed = settings.deadline is not None and now >= settings.deadline
+        if closed and subject_id not in _finalized:
+            # Deadlines are entered in local time, snapshot timestamps are UTC
+            deadline_utc = settings.deadline.astimezone(timezone.utc).replace(tzinfo=None)
+            version = freeze_subject(subject_id, unless_frozen_after=deadline_utc)
+            if version:
+                logger.info("Review window closed for subject %s, froze marks as version %s", subject_id, version)
+            _finalized.add(subject_id)
+        elif not closed:
+            # Deadline was moved back, freeze again when it passes
+            _finalized.discard(subject_id)
+
+
+def _run(app, interval):
+    while True:
+        try:
+            with app.app_context():
+                tick()
+                db.session.remove()
+        except Exception:
+            logger.exception("Review window scheduler tick failed")
+        time.sleep(interval)
+
+
+def start_scheduler(app):
+    """Start the scheduler thread once per process (safe to call after a fork)."""
+    global _thread_pid
+    with _start_lock:
+        if _thread_pid == os.getpid():
+            return
+        _thread_pid = os.getpid()
+        thread = threading.Thread(target=_run, args=(app, app.config["SCHEDULER_INTERVAL"]),
+                                  name="review-window-scheduler", daemon=True)
+        thread.start()
+
+
+def init_scheduler(app):
+    if not app.config.get("SCHEDULER_ENABLED", True):
+        return
+
+    # Started lazily so each forked worker gets its own thread
+    @app.before_request
+    def _ensure_scheduler():
+        if _thread_pid != os.getpid():
+            start_scheduler(app)
@@ -0,0 +1,239 @@
+"""Full-text search over peer review comments, anonymous reviews and self-assessments.
+
+Every text row has one document in the ``review_search`` table: an FTS5
+virtual table on SQLite, a table with a generated ``tsvector`` column and a
+GIN index on PostgreSQL. Documents are written in the same transaction as
+the rows they index (see ``_sync_documents``). Archived rows keep their ids,
+so their documents stay valid after ``flask archive-terms``; the hot review
+tables never reuse ids (AUTOINCREMENT on SQLite, sequences on PostgreSQL). Set-based
+deletes of subjects, groups and users skip the flush, so their documents are
+removed by ``_drop_deleted_documents`` in the same transaction.
+"""
+import re
+from collections import namedtuple
+
+import click
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, column, delete, event, or_, select, table, text
+from sqlalchemy.orm import Session, undefer_group
+
+from anonymous_feedback import released_ids
+from models import (db, User, Subject, Group, PeerReview, SelfAssessment, AnonymousReview,
+                    ArchivedPeerReview, ArchivedSelfAssessment, ArchivedAnonymousReview)
+
+TABLE = "review_search"
+KINDS = {PeerReview: "peer", AnonymousReview: "anonymous", SelfAssessment: "self"}
+SELF_FIELDS = ("summary", "challenges", "different", "role", "feedback")
+
+# Highlight markers put around matches by snippet()/ts_headline(), turned into <mark> after escaping
+_START, _STOP = "\x02", "\x03"
+
+Hit = namedtuple("Hit", "kind source_id subject_name group_name author reviewee excerpt")
+
+DDL = {
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "body, kind UNINDEXED, source_id UNINDEXED, group_id UNINDEXED, author_id UNINDEXED, "
+        "reviewee_id UNINDEXED, tokenize='porter unicode61')",
+    ],
+    "postgresql": [
+        f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+        "kind VARCHAR(10) NOT NULL, source_id INTEGER NOT NULL, group_id INTEGER, author_id INTEGER, "
+        "reviewee_id INTEGER, body TEXT NOT NULL, "
+        "document TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', body)) STORED, "
+        "PRIMARY KEY (kind, source_id))",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_document ON {TABLE} USING GIN (document)",
+        f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_group_id ON {TABLE} (group_id)",
+    ],
+}
+
+_INSERT = text(
+    f"INSERT INTO {TABLE} (kind, source_id, group_id, author_id, reviewee_id, body) "
+    "VALUES (:kind, :source_id, :group_id, :author_id, :reviewee_id, :body)"
+)
+_DELETE = text(f"DELETE FROM {TABLE} WHERE kind = :kind AND source_id = :source_id")
+_documents = table(TABLE, column("group_id"), column("author_id"), column("reviewee_id"))
+
+
+def supported(dialect_name):
+    return dialect_name in DDL
+
+
+def create_index(connection):
+    for statement in DDL.get(connection.dialect.name, ()):
+        connection.execute(text(statement))
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_with_tables(target, connection, **kw):
+    # db.create_all() (local SQLite, benchmarks); deployed databases get it from the migration
+    create_index(connection)
+
+
+# ---------------- DOCUMENTS ---------------- #
+def _int(value):
+    # FTS5 columns have no type affinity and views may set ids from request strings
+    return int(value) if value is not None else None
+
+
+def document(obj):
+    """Index row for a review/self-assessment (hot or archived), or None if it has no text."""
+    if isinstance(obj, (PeerReview, ArchivedPeerReview)):
+        kind, author_id, reviewee_id, body = "peer", obj.reviewer_id, obj.reviewee_id, obj.comment
+    elif isinstance(obj, (AnonymousReview, ArchivedAnonymousReview)):
+        # Anonymous reviews are stored under their author's id (reviewee_id); index no user at all
+        kind, author_id, reviewee_id, body = "anonymous", None, None, obj.comment
+    else:
+        kind, author_id, reviewee_id = "self", obj.user_id, None
+        body = "\n".join(getattr(obj, f) for f in SELF_FIELDS if getattr(obj, f))
+    if not body or not body.strip():
+        return None
+    return {"kind": kind, "source_id": obj.id, "group_id": _int(obj.group_id),
+            "author_id": _int(author_id), "reviewee_id": _int(reviewee_id), "body": body}
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_documents(session, flush_context):
+    changed = [obj for obj in (*session.new, *session.dirty) if type(obj) in KINDS]
+    deleted = [obj for obj in session.deleted if type(obj) in KINDS]
+    if not changed and not deleted:
+        return
+    connection = session.connection()
+    if not supported(connection.dialect.name):
+        return
+    stale = [{"kind": KINDS[type(obj)], "source_id": obj.id} for obj in (*changed, *deleted)]
+    connection.execute(_DELETE, stale)
+    docs = [doc for doc in map(document, changed) if doc]
+    if docs:
+        connection.execute(_INSERT, docs)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _drop_deleted_documents(orm_execute_state):
+    # Reviews of deleted subjects/groups/users go via ON DELETE CASCADE, their documents don't;
+    # SQLite reuses the ids, so leftovers would show up under the next group or user.
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in (Subject, Group, User):
+        return
+    connection = orm_execute_state.session.connection()
+    if not supported(connection.dialect.name):
+        return
+    deleted = select(model.id)
+    if orm_execute_state.statement.whereclause is not None:
+        deleted = deleted.where(orm_execute_state.statement.whereclause)
+    if model is Subject:
+        condition = _documents.c.group_id.in_(select(Group.id).where(Group.subject_id.in_(deleted)))
+    elif model is Group:
+        condition = _documents.c.group_id.in_(deleted)
+    else:
+        condition = or_(_documents.c.author_id.in_(deleted), _documents.c.reviewee_id.in_(deleted))
+    connection.execute(delete(_documents).where(condition))
+
+
+def rebuild():
+    """Recreate every document from the hot and archive tables. Returns the number indexed."""
+    connection = db.session.connection()
+    create_index(connection)
+    connection.execute(text(f"DELETE FROM {TABLE}"))
+    total = 0
+    for model in (PeerReview, AnonymousReview, SelfAssessment,
+                  ArchivedPeerReview, ArchivedAnonymousReview, ArchivedSelfAssessment):
+        query = select(model)
+        if model in (SelfAssessment, ArchivedSelfAssessment):
+            query = query.options(undefer_group("text"))
+        for rows in db.session.scalars(query.execution_options(yield_per=1000)).partitions():
+            docs = [doc for doc in map(document, rows) if doc]
+            if docs:
+                connection.execute(_INSERT, docs)
+                total += len(docs)
+    db.session.commit()
+    return total
+
+
+@click.command("search-index")
+@with_appcontext
+def search_index_command():
+    """Rebuild the full-text search index of review comments and self-assessments."""
+    click.echo(f"Indexed {rebuild()} documents.")
+
+
+# ---------------- QUERIES ---------------- #
+_TERMS = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _fts5_query(q):
+    """User input as FTS5 phrases ("quoted phrases" kept together), so punctuation is never syntax."""
+    terms = [phrase or word for phrase, word in _TERMS.findall(q)]
+    return " ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+
+
+_SEARCH = {
+    "sqlite": text(
+        f"SELECT kind, source_id, group_id, author_id, reviewee_id, "
+        f"snippet({TABLE}, 0, :start, :stop, '…', 16) AS excerpt "
+        f"FROM {TABLE} WHERE {TABLE} MATCH :q AND group_id IN :group_ids "
+        "ORDER BY bm25(" + TABLE + ") LIMIT :limit OFFSET :offset"
+    ).bindparams(bindparam("group_ids", expanding=True)),
+    "postgresql": text(
+        f"SELECT kind, source_id, group_id, author_id, reviewee_id, "
+        "ts_headline('english', body, query, :headline) AS excerpt "
+        f"FROM {TABLE}, websearch_to_tsquery('english', :q) AS query "
+        "WHERE document @@ query AND group_id IN :group_ids "
+        "ORDER BY ts_rank(document, query) DESC, source_id LIMIT :limit OFFSET :offset"
+    ).bindparams(bindparam("group_ids", expanding=True)),
+}
+
+
+def _highlight(excerpt):
+    return Markup(str(escape(excerpt)).replace(_START, "<mark>").replace(_STOP, "</mark>"))
+
+
+def search(q, lecturer_id, subject_id=None, page=1, page_size=20):
+    """Ranked hits of ``q`` within a lecturer's subjects. Returns (hits, has_next)."""
+    groups_query = (
+        select(Group.id, Group.name, Subject.name, Subject.archived_at)
+        .join(Subject, Subject.id == Group.subject_id)
+        .where(Subject.lecturer_id == lecturer_id)
+    )
+    if subject_id:
+        groups_query = groups_query.where(Subject.id == subject_id)
+    groups = {gid: (group_name, subject_name, archived_at)
+              for gid, group_name, subject_name, archived_at in db.session.execute(groups_query)}
+
+    dialect = db.session.get_bind().dialect.name
+    if not q.strip() or not groups or not supported(dialect):
+        return [], False
+    params = {"q": _fts5_query(q) if dialect == "sqlite" else q, "group_ids": list(groups),
+              "limit": page_size + 1, "offset": (page - 1) * page_size, "start": _START, "stop": _STOP,
+              "headline": f"StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=30, MinWords=10"}
+    rows = db.session.execute(_SEARCH[dialect], params).all()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    user_ids = {uid for r in rows for uid in (r.author_id, r.reviewee_id) if uid}
+    names = {
+        u.id: f"{u.first_name} {u.last_name}"
+        for u in db.session.query(User.id, User.first_name, User.last_name).filter(User.id.in_(user_ids))
+    } if user_ids else {}
+
+    # Anonymous comments only show up once results.html would release them (whole batches)
+    released = {
+        gid: released_ids(gid, groups[gid][2])
+        for gid in {r.group_id for r in rows if r.kind == "anonymous"}
+    }
+
+    hits = []
+    for r in rows:
+        if r.kind == "anonymous" and r.source_id not in released[r.group_id]:
+            continue
+        # Documents of students deleted outside the app linger until the next rebuild; skip them
+        if (r.author_id and r.author_id not in names) or (r.reviewee_id and r.reviewee_id not in names):
+            continue
+        group_name, subject_name, _ = groups[r.group_id]
+        hits.append(Hit(r.kind, r.source_id, subject_name, group_name, names.get(r.author_id),
+                        names.get(r.reviewee_id), _highlight(r.excerpt)))
+    return hits, has_next
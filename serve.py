@@ -0,0 +1,86 @@
+"""Production entry point: ``python serve.py``.
+
+Builds the app once in the gunicorn master (preload), warms it, then forks
+SERVER_WORKERS workers with SERVER_THREADS threads each. SIGTERM lets
+in-flight requests finish for up to SERVER_GRACEFUL_TIMEOUT seconds.
+"""
+import logging
+
+from sqlalchemy import text
+
+from app import create_app
+from cache import load_settings
+from models import db
+import uniqueness
+
+logger = logging.getLogger(__name__)
+
+
+def warmup(app):
+    """Pre-fork warmup: settings cache, taken-names filter and a database round trip.
+
+    Templates are already compiled by create_app (PRECOMPILE_TEMPLATES).
+    """
+    with app.app_context():
+        db.session.execute(text("SELECT 1"))
+        load_settings()
+        uniqueness.build()
+        db.session.remove()
+        # Connections must not be shared across fork(); workers open their own
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def warm_pool(app):
+    """Open the pool's connections in a freshly forked worker before it takes traffic."""
+    size = app.config.get("DB_POOL_SIZE") or 5
+    wanted = min(size, app.config["SERVER_THREADS"])
+    with app.app_context():
+        for engine in db.engines.values():
+            # Forget anything inherited from the master without closing its sockets
+            engine.dispose(close=False)
+            connections = [engine.connect() for _ in range(wanted)]
+            for conn in connections:
+                conn.close()
+
+
+def run(app):
+    from gunicorn.app.base import BaseApplication
+
+    cfg = app.config
+
+    def post_worker_init(worker):
+        warm_pool(app)
+
+    def worker_exit(server, worker):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    options = {
+        "bind": cfg["SERVER_BIND"],
+        "workers": cfg["SERVER_WORKERS"],
+        "threads": cfg["SERVER_THREADS"],
+        "timeout": cfg["SERVER_TIMEOUT"],
+        "graceful_timeout": cfg["SERVER_GRACEFUL_TIMEOUT"],
+        "preload_app": True,
+        "post_worker_init": post_worker_init,
+        "worker_exit": worker_exit,
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    logger.info("Starting %s workers x %s threads on %s", options["workers"], options["threads"], options["bind"])
+    Server().run()
+
+
+if __name__ == "__main__":
+    application = create_app()
+    warmup(application)
+    run(application)
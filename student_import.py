@@ -0,0 +1,186 @@
+"""Streaming student CSV import.
+
+Rows are read straight from the upload stream and handled in chunks of
+IMPORT_CHUNK_SIZE: each chunk is validated, checked against the database
+with one query and committed on its own, so a bad row only costs its own
+chunk and memory stays flat for large files.
+"""
+import base64
+import codecs
+import csv
+import hashlib
+import io
+import re
+from collections import namedtuple
+
+from sqlalchemy import or_
+
+from models import db, User, GroupMember
+
+REQUIRED_FIELDS = ("first_name", "last_name", "email", "username", "password")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+RowError = namedtuple("RowError", "line field message")
+ImportResult = namedtuple("ImportResult", "inserted skipped error_count errors")
+
+
+def _fingerprint(value):
+    """64-bit hash of a normalised value; a set of ints is far smaller than a set of strings."""
+    return int.from_bytes(hashlib.blake2b(value.lower().encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _chunks(reader, size):
+    chunk = []
+    for row in reader:
+        chunk.append((reader.line_num, row))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(row):
+    return {(k or "").strip().lower(): (v or "").strip() for k, v in row.items() if k is not None}
+
+
+def _id_number(row):
+    return row.get("id_number") or row.get("student_id") or None
+
+
+class _Importer:
+    def __init__(self, valid_group_ids, max_errors):
+        self.valid_group_ids = set(valid_group_ids)
+        self.max_errors = max_errors
+        self.seen_usernames = set()
+        self.seen_emails = set()
+        self.seen_id_numbers = set()
+        self.inserted = self.skipped = self.error_count = 0
+        self.errors = []
+
+    def error(self, line, field, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(RowError(line, field, message))
+
+    def validate(self, line, row):
+        ok = True
+        for field in REQUIRED_FIELDS:
+            if not row.get(field):
+                self.error(line, field, "missing value")
+                ok = False
+        if row.get("email") and not EMAIL_RE.match(row["email"]):
+            self.error(line, "email", f"invalid email {row['email']!r}")
+            ok = False
+        if not ok:
+            return False
+
+        username_fp, email_fp = _fingerprint(row["username"]), _fingerprint(row["email"])
+        if username_fp in self.seen_usernames:
+            self.error(line, "username", f"duplicate username {row['username']!r} in file")
+            ok = False
+        if email_fp in self.seen_emails:
+            self.error(line, "email", f"duplicate email {row['email']!r} in file")
+            ok = False
+        id_number = _id_number(row)
+        if id_number:
+            id_number_fp = _fingerprint(id_number)
+            if id_number_fp in self.seen_id_numbers:
+                self.error(line, "id_number", f"duplicate ID number {id_number!r} in file")
+                ok = False
+            self.seen_id_numbers.add(id_number_fp)
+        self.seen_usernames.add(username_fp)
+        self.seen_emails.add(email_fp)
+        return ok
+
+    def import_chunk(self, chunk):
+        rows = []
+        for line, raw in chunk:
+            row = _clean(raw)
+            if self.validate(line, row):
+                rows.append((line, row))
+            else:
+                self.skipped += 1
+        if not rows:
+            return
+
+        # One query per chunk for clashes with existing accounts
+        usernames = [r["username"] for _, r in rows]
+        emails = [r["email"] for _, r in rows]
+        id_numbers = [n for n in (_id_number(r) for _, r in rows) if n]
+        taken = db.session.query(User.username, User.email, User.id_number).filter(
+            or_(User.username.in_(usernames), User.email.in_(emails), User.id_number.in_(id_numbers))
+        ).all()
+        taken_usernames = {u.lower() for u, _, _ in taken}
+        taken_emails = {e.lower() for _, e, _ in taken}
+        taken_id_numbers = {n for _, _, n in taken if n}
+
+        users = []
+        for line, row in rows:
+            if row["username"].lower() in taken_usernames:
+                self.error(line, "username", f"username {row['username']!r} already exists")
+            elif row["email"].lower() in taken_emails:
+                self.error(line, "email", f"email {row['email']!r} already exists")
+            elif _id_number(row) in taken_id_numbers:
+                self.error(line, "id_number", f"ID number {_id_number(row)!r} already exists")
+            else:
+                user = User(first_name=row["first_name"], last_name=row["last_name"], email=row["email"],
+                            username=row["username"], password=row["password"], role="student",
+                            id_number=_id_number(row))
+                users.append((line, row, user))
+                continue
+            self.skipped += 1
+
+        try:
+            db.session.add_all([u for _, _, u in users])
+            db.session.flush()  # user ids for the memberships
+            for line, row, user in users:
+                group_id = row.get("group_id")
+                if not group_id:
+                    continue
+                if group_id.isdigit() and int(group_id) in self.valid_group_ids:
+                    db.session.add(GroupMember(group_id=int(group_id), id_number=user.id))
+                else:
+                    self.error(line, "group_id", f"group {group_id!r} is not one of your groups, added without a group")
+            db.session.commit()
+            self.inserted += len(users)
+        except Exception as e:
+            db.session.rollback()
+            for line, _, _ in users:
+                self.error(line, "", f"not saved: {e.__class__.__name__}")
+            self.skipped += len(users)
+
+
+def import_students_csv(stream, valid_group_ids, chunk_size=500, max_errors=10000):
+    """Import students from a binary CSV stream. Returns an ImportResult."""
+    text = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    reader = csv.DictReader(text)
+    importer = _Importer(valid_group_ids, max_errors)
+
+    missing = [f for f in REQUIRED_FIELDS if f not in {(h or "").strip().lower() for h in reader.fieldnames or ()}]
+    if missing:
+        importer.error(1, ",".join(missing), "missing required column(s)")
+        return ImportResult(0, 0, importer.error_count, importer.errors)
+
+    for chunk in _chunks(reader, chunk_size):
+        importer.import_chunk(chunk)
+    errors = sorted(importer.errors, key=lambda e: e.line)
+    return ImportResult(importer.inserted, importer.skipped, importer.error_count, errors)
+
+
+def report_csv(result):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["line", "field", "message"])
+    writer.writerows(result.errors)
+    if result.error_count > len(result.errors):
+        writer.writerow(["", "", f"{result.error_count - len(result.errors)} more errors not listed"])
+    return buf.getvalue()
+
+
+def report_data_uri(result):
+    """The error report as a data: URI, sent inline with the import response.
+
+    Nothing is kept server-side, so the download works whichever worker served the import.
+    """
+    return "data:text/csv;base64," + base64.b64encode(report_csv(result).encode("utf-8")).decode("ascii")
@@ -0,0 +1,53 @@
+"""Shared fixtures: one app on a throwaway SQLite database, never the one in .env."""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Must be set before config.py is imported
+os.environ["DIRECT_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["SCHEDULER_ENABLED"] = "0"
+os.environ["PRECOMPILE_TEMPLATES"] = "0"
+os.environ["LOG_CONFIGURE"] = "0"
+
+PASSWORD = "test-password"
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+    from models import db
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user with a unique username; returns its id."""
+    from werkzeug.security import generate_password_hash
+    from models import db, User
+
+    hashed = generate_password_hash(PASSWORD)
+
+    def make(role="student", **fields):
+        n = next(_ids)
+        with app.app_context():
+            user = User(first_name=f"First{n}", last_name=f"Last{n}", email=f"user{n}@test",
+                        username=f"user{n}", password=hashed, role=role, **fields)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make
+
+
+def login(client, username, role):
+    return client.post("/login", data={"username": username, "password": PASSWORD, "role": role})
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+
+
+def test_new_reviews_never_reuse_archived_ids(app, make_user):
+    import archive
+    from models import db, Subject, Group, GroupMember, PeerReview, ArchivedPeerReview
+
+    lecturer, reviewer, reviewee = make_user("lecturer"), make_user(), make_user()
+    with app.app_context():
+        closed = Subject(name="Archive-closed", lecturer_id=lecturer)
+        open_ = Subject(name="Archive-open", lecturer_id=lecturer)
+        db.session.add_all([closed, open_])
+        db.session.flush()
+        groups = [Group(name="g", subject_id=closed.id), Group(name="g", subject_id=open_.id)]
+        db.session.add_all(groups)
+        db.session.flush()
+        db.session.add_all(GroupMember(group_id=g.id, id_number=s) for g in groups for s in (reviewer, reviewee))
+        # The newest hot review is the one that gets archived
+        db.session.add(PeerReview(reviewer_id=reviewer, reviewee_id=reviewee, group_id=groups[0].id, score=3,
+                                  comment="archived remark"))
+        db.session.commit()
+        archived_id = db.session.query(db.func.max(PeerReview.id)).scalar()
+
+        archive.archive_subject(closed.id)
+        assert db.session.get(ArchivedPeerReview, archived_id) is not None
+
+        review = PeerReview(reviewer_id=reviewer, reviewee_id=reviewee, group_id=groups[1].id, score=4, comment="new")
+        db.session.add(review)
+        db.session.commit()
+        assert review.id > archived_id
+        # The archived row's search document survives the new review's sync
+        assert db.session.execute(text("SELECT count(*) FROM review_search WHERE kind = 'peer' AND source_id = :id"),
+                                  {"id": archived_id}).scalar() == 1
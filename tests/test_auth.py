@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import event
+
+from conftest import PASSWORD
+
+
+@pytest.fixture
+def limiter(app):
+    import ratelimit
+    app.config.update(LOGIN_MAX_FAILURES_PER_USER=3, LOGIN_MAX_FAILURES_PER_IP=5)
+    ratelimit.init_rate_limit(app)
+    yield ratelimit.login_limiter
+    app.config.update(LOGIN_MAX_FAILURES_PER_USER=10, LOGIN_MAX_FAILURES_PER_IP=50)
+    ratelimit.init_rate_limit(app)
+
+
+@pytest.fixture
+def user_queries(app):
+    """SQL statements that read the users table, collected while the test runs."""
+    from models import db
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", collect)
+    yield statements
+    event.remove(engine, "before_cursor_execute", collect)
+
+
+def _login(client, username, password, ip, **environ):
+    return client.post("/login", data={"username": username, "password": password, "role": "student"},
+                       environ_base={"REMOTE_ADDR": ip, **environ})
+
+
+def _username(app, user_id):
+    from models import db, User
+    with app.app_context():
+        return db.session.get(User, user_id).username
+
+
+def test_brute_forced_user_still_logs_in_from_their_own_ip(app, make_user, limiter, user_queries):
+    victim = _username(app, make_user())
+    attacker, client = "203.0.113.66", app.test_client()
+    for _ in range(3):
+        assert _login(client, victim, "wrong", attacker).status_code == 200
+
+    # The attacker's next guesses are rejected before the users query
+    user_queries.clear()
+    assert _login(client, victim, PASSWORD, attacker).status_code == 429
+    assert user_queries == []
+
+    # The victim, from their own address, is not locked out
+    assert _login(app.test_client(), victim, PASSWORD, "198.51.100.66").status_code == 302
+
+
+def test_locked_ip_is_rejected_before_the_user_query(app, make_user, limiter, user_queries):
+    student = _username(app, make_user())
+    client = app.test_client()
+    for i in range(5):
+        _login(client, f"guess{i}", "wrong", "203.0.113.9")
+
+    user_queries.clear()
+    assert _login(client, student, PASSWORD, "203.0.113.9").status_code == 429
+    assert user_queries == []
+
+    assert _login(client, student, PASSWORD, "198.51.100.4").status_code == 302
+
+
+def test_forwarded_client_address_is_used_behind_a_proxy(app, make_user, limiter):
+    import ratelimit
+    from app import create_app
+    from config import Config
+
+    proxied = create_app(type("ProxiedConfig", (Config,), {"PROXY_FIX_X_FOR": 1}))
+    proxied.config.update(LOGIN_MAX_FAILURES_PER_USER=3, LOGIN_MAX_FAILURES_PER_IP=5)
+    ratelimit.init_rate_limit(proxied)
+
+    student = _username(app, make_user())
+    client = proxied.test_client()
+    for i in range(5):
+        _login(client, f"proxied{i}", "wrong", "10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.20")
+    # Same proxy, another client
+    assert _login(client, student, PASSWORD, "10.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.20").status_code == 302
+    assert _login(client, student, PASSWORD, "10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.20").status_code == 429
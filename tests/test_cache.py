@@ -0,0 +1,33 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+def test_subject_version_follows_edits_made_by_any_worker(app, make_user):
+    from cache import subject_version
+    from models import db, Subject, Group, SelfAssessment
+
+    lecturer, student = make_user("lecturer"), make_user()
+    with app.app_context():
+        subject = Subject(name="Cache-versions", lecturer_id=lecturer)
+        db.session.add(subject)
+        db.session.flush()
+        group = Group(name="g", subject_id=subject.id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add(SelfAssessment(user_id=student, group_id=group.id, summary="s", challenges="c",
+                                      different="d", role="r"))
+        db.session.commit()
+        before = subject_version(subject.id)
+        assert subject_version(subject.id) == before
+
+        # Another worker edits the self-assessment in place: no insert, no delete
+        with Session(db.engine) as other:
+            other.scalars(db.select(SelfAssessment).filter_by(group_id=group.id)).one().summary = "edited"
+            other.commit()
+        edited = subject_version(subject.id)
+        assert edited != before
+
+        with Session(db.engine) as other:
+            other.execute(update(Subject).where(Subject.id == subject.id).values(archived_at=db.func.now()))
+            other.commit()
+        assert subject_version(subject.id) != edited
@@ -0,0 +1,30 @@
+def test_event_mode_recycles_a_stale_connection_after_one_failed_request(app, make_user):
+    import metrics
+    from app import create_app
+    from config import Config
+    from conftest import PASSWORD
+    from models import db, User
+
+    with app.app_context():
+        username = db.session.get(User, make_user()).username
+    event_app = create_app(type("EventConfig", (Config,), {"DB_DISCONNECT_HANDLING": "event"}))
+    with event_app.app_context():
+        engine = db.engine
+    assert not engine.pool._pre_ping
+
+    def log_in():
+        return event_app.test_client().post("/login", data={"username": username, "password": PASSWORD,
+                                                            "role": "student"})
+
+    assert log_in().status_code == 302
+    # The server closed every pooled connection behind the app's back
+    stale = [record.dbapi_connection for record in engine.pool._pool.queue]
+    assert stale
+    for connection in stale:
+        connection.close()
+
+    disconnects = metrics._disconnects
+    assert log_in().status_code == 500
+    assert metrics._disconnects == disconnects + 1
+    assert log_in().status_code == 302
+    assert all(record.dbapi_connection not in stale for record in engine.pool._pool.queue)
@@ -0,0 +1,39 @@
+def _subject_with_student(app, lecturer_id, student_ids, name):
+    from models import db, Subject, Group, GroupMember
+    with app.app_context():
+        subject = Subject(name=name, lecturer_id=lecturer_id)
+        db.session.add(subject)
+        db.session.flush()
+        group = Group(name=f"{name} group", subject_id=subject.id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add_all(GroupMember(group_id=group.id, id_number=sid) for sid in student_ids)
+        db.session.commit()
+        return subject.id
+
+
+class ListBackend:
+    def __init__(self):
+        self.messages = []
+
+    def send_batch(self, messages):
+        self.messages.extend(messages)
+
+
+def test_reminders_are_deduplicated_per_subject(app, make_user):
+    import reminders
+
+    student, classmate = make_user(), make_user()
+    subject_a = _subject_with_student(app, make_user("lecturer"), [student, classmate], "Remind-A")
+    subject_b = _subject_with_student(app, make_user("lecturer"), [student, classmate], "Remind-B")
+
+    with app.app_context():
+        backend = ListBackend()
+        assert reminders.send_reminders(backend, subject_id=subject_a).sent == 2
+        # Lecturer B's reminder still goes out to students lecturer A reminded today
+        result = reminders.send_reminders(backend, subject_id=subject_b)
+        assert (result.sent, result.skipped) == (2, 0)
+        assert all("Remind-B" in m.body and "Remind-A" not in m.body for m in backend.messages[2:])
+
+        result = reminders.send_reminders(backend, subject_id=subject_b)
+        assert (result.sent, result.skipped) == (0, 2)
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+from flask import g
+from sqlalchemy import delete
+
+
+def test_set_based_delete_pins_the_user_to_the_primary(app):
+    from app import create_app
+    from config import Config
+    from models import db, PeerReview
+    from replica import read_replica
+
+    replica_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "replica.db")
+    replica_app = create_app(type("ReplicaConfig", (Config,), {"SQLALCHEMY_BINDS": {"replica": replica_url}}))
+
+    @replica_app.route("/_test/bulk-delete", methods=["POST"])
+    def bulk_delete():
+        db.session.execute(delete(PeerReview).where(PeerReview.id == -1))
+        db.session.commit()
+        return "deleted"
+
+    @replica_app.route("/_test/report")
+    @read_replica
+    def report():
+        return "replica" if g.get("use_replica") else "primary"
+
+    client = replica_app.test_client()
+    assert client.get("/_test/report").get_data(as_text=True) == "replica"
+    client.post("/_test/bulk-delete")
+    # Read-your-writes: the next reads of this user go to the primary
+    assert client.get("/_test/report").get_data(as_text=True) == "primary"
+    assert replica_app.test_client().get("/_test/report").get_data(as_text=True) == "replica"
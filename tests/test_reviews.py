@@ -0,0 +1,62 @@
+from conftest import login
+
+
+def test_review_feed_pages_past_reviews_without_created_at(app, make_user):
+    from models import db, User, Subject, Group, PeerReview
+
+    lecturer, reviewer, reviewee = make_user("lecturer"), make_user(), make_user()
+    with app.app_context():
+        subject = Subject(name="Feed-null-dates", lecturer_id=lecturer)
+        db.session.add(subject)
+        db.session.flush()
+        group = Group(name="g", subject_id=subject.id)
+        db.session.add(group)
+        db.session.flush()
+        reviews = [PeerReview(reviewer_id=reviewer, reviewee_id=reviewee, group_id=group.id, score=3,
+                              comment=f"feed comment {i}") for i in range(4)]
+        db.session.add_all(reviews)
+        db.session.flush()
+        # Rows imported before created_at had a default
+        for review in reviews[:2]:
+            review.created_at = None
+        db.session.commit()
+        username = db.session.get(User, lecturer).username
+
+    client = app.test_client()
+    login(client, username, "lecturer")
+    page_size, app.config["REVIEWS_PAGE_SIZE"] = app.config["REVIEWS_PAGE_SIZE"], 1
+    try:
+        seen, url = [], "/reviews"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            html = response.get_data(as_text=True)
+            seen += [i for i in range(4) if f"feed comment {i}" in html]
+            cursor = html.partition("cursor=")[2].partition('"')[0]
+            url = f"/reviews?cursor={cursor}" if cursor else None
+    finally:
+        app.config["REVIEWS_PAGE_SIZE"] = page_size
+    assert seen == [3, 2, 1, 0]
+
+
+def test_api_rejects_reviews_that_are_not_a_list(app, make_user):
+    from models import db, User, Subject, Group, GroupMember
+
+    lecturer, student, peer = make_user("lecturer"), make_user(), make_user()
+    with app.app_context():
+        subject = Subject(name="Api-reviews-list", lecturer_id=lecturer)
+        db.session.add(subject)
+        db.session.flush()
+        group = Group(name="g", subject_id=subject.id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add_all(GroupMember(group_id=group.id, id_number=s) for s in (student, peer))
+        db.session.commit()
+        group_id, username = group.id, db.session.get(User, student).username
+
+    client = app.test_client()
+    login(client, username, "student")
+    for reviews in ({str(peer): {"score": 4}}, "4", 4):
+        response = client.post(f"/api/groups/{group_id}/submission", json={"reviews": reviews})
+        assert response.status_code == 400
+        assert "reviews must be a list." in response.get_json()["errors"]
@@ -0,0 +1,118 @@
+from sqlalchemy import text
+
+from conftest import login
+
+
+def _group_with_review(app, lecturer_id, reviewer_id, reviewee_id, comment, name):
+    from models import db, Subject, Group, GroupMember, PeerReview
+    with app.app_context():
+        subject = Subject(name=name, lecturer_id=lecturer_id)
+        db.session.add(subject)
+        db.session.flush()
+        group = Group(name=f"{name} group", subject_id=subject.id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add_all([GroupMember(group_id=group.id, id_number=reviewer_id),
+                            GroupMember(group_id=group.id, id_number=reviewee_id),
+                            PeerReview(reviewer_id=reviewer_id, reviewee_id=reviewee_id, group_id=group.id,
+                                       score=2, comment=comment)])
+        db.session.commit()
+        return subject.id, group.id
+
+
+def _documents(app, **where):
+    from models import db
+    clause = " AND ".join(f"{column} = :{column}" for column in where) or "1 = 1"
+    with app.app_context():
+        return db.session.execute(text(f"SELECT count(*) FROM review_search WHERE {clause}"), where).scalar()
+
+
+def test_deleting_a_group_drops_its_documents(app, make_user):
+    from models import db, User, Group, Subject
+    from search import search
+
+    lecturer_a, lecturer_b = make_user("lecturer"), make_user("lecturer")
+    reviewer, reviewee = make_user(), make_user()
+    _, group_id = _group_with_review(app, lecturer_a, reviewer, reviewee, "secret slacker remark", "A-subj")
+    assert _documents(app, group_id=group_id) == 1
+
+    client = app.test_client()
+    with app.app_context():
+        username = db.session.get(User, lecturer_a).username
+    login(client, username, "lecturer")
+    assert client.post(f"/groups/{group_id}/delete").status_code == 302
+    assert _documents(app, group_id=group_id) == 0
+
+    # SQLite hands the freed id to the next group
+    with app.app_context():
+        subject = Subject(name="B-subj", lecturer_id=lecturer_b)
+        db.session.add(subject)
+        db.session.flush()
+        db.session.add(Group(id=group_id, name="B group", subject_id=subject.id))
+        db.session.commit()
+        assert search("slacker", lecturer_b) == ([], False)
+
+
+def test_deleting_a_subject_or_student_drops_their_documents(app, make_user):
+    from models import db, User
+
+    lecturer = make_user("lecturer")
+    reviewer, reviewee, other = make_user(), make_user(), make_user()
+    subject_id, group_id = _group_with_review(app, lecturer, reviewer, reviewee, "kept notes", "C-subj")
+    _group_with_review(app, lecturer, other, reviewee, "late again", "D-subj")
+
+    client = app.test_client()
+    with app.app_context():
+        username = db.session.get(User, lecturer).username
+    login(client, username, "lecturer")
+
+    assert client.post(f"/students/{other}/delete").status_code == 302
+    assert _documents(app, author_id=other) == 0
+    assert _documents(app, group_id=group_id) == 1
+
+    assert client.post(f"/subjects/{subject_id}/delete").status_code == 302
+    assert _documents(app, group_id=group_id) == 0
+
+
+def test_anonymous_hits_name_nobody(app, make_user):
+    from models import db, User, AnonymousReview
+    from search import search
+
+    lecturer = make_user("lecturer")
+    authors = [make_user() for _ in range(3)]
+    _, group_id = _group_with_review(app, lecturer, authors[0], authors[1], "fine", "E-subj")
+    with app.app_context():
+        names = [f"{u.first_name} {u.last_name}" for u in (db.session.get(User, a) for a in authors)]
+        # Stored under the author's id, as the review form does
+        db.session.add_all(
+            AnonymousReview(reviewee_id=a, group_id=group_id, comment=f"the group leader never listened {i}")
+            for i, a in enumerate(authors)
+        )
+        db.session.commit()
+        lecturer_username = db.session.get(User, lecturer).username
+        assert _documents(app, kind="anonymous", group_id=group_id) == 3
+        hits, _ = search("leader", lecturer)
+        assert len(hits) == 3
+        assert all(h.kind == "anonymous" and h.author is None and h.reviewee is None for h in hits)
+
+    client = app.test_client()
+    login(client, lecturer_username, "lecturer")
+    page = client.get("/reviews/search?q=leader").get_data(as_text=True)
+    assert "never listened" in page
+    assert not any(name in page for name in names)
+
+
+def test_anonymous_hits_wait_for_their_release_batch(app, make_user):
+    from models import db, AnonymousReview
+    from search import search
+
+    lecturer = make_user("lecturer")
+    authors = [make_user() for _ in range(4)]
+    _, group_id = _group_with_review(app, lecturer, authors[0], authors[1], "fine", "F-subj")
+    with app.app_context():
+        for i, author in enumerate(authors):
+            db.session.add(AnonymousReview(reviewee_id=author, group_id=group_id, comment=f"withheld remark {i}"))
+            db.session.commit()
+            hits, _ = search("withheld", lecturer)
+            # Batches of ANONYMOUS_BATCH_SIZE (3), like the results page
+            assert len(hits) == (3 if i >= 2 else 0)
@@ -0,0 +1,31 @@
+import io
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+
+def test_id_numbers_are_unique_when_set(app, make_user):
+    from models import db
+    make_user(id_number="S-1001")
+    make_user(), make_user()  # any number of users without one
+    with pytest.raises(IntegrityError):
+        make_user(id_number="S-1001")
+    with app.app_context():
+        db.session.rollback()
+
+
+def test_import_reports_taken_and_repeated_id_numbers(app, make_user):
+    import student_import
+
+    make_user(id_number="S-2001")
+    csv_file = io.BytesIO(
+        b"first_name,last_name,email,username,password,id_number\n"
+        b"Ann,Lee,ann@import.test,ann_import,pw,S-2001\n"
+        b"Ben,Ong,ben@import.test,ben_import,pw,S-2002\n"
+        b"Cai,Tan,cai@import.test,cai_import,pw,S-2002\n"
+        b"Dev,Raj,dev@import.test,dev_import,pw,\n"
+    )
+    with app.app_context():
+        result = student_import.import_students_csv(csv_file, [])
+    assert (result.inserted, result.skipped) == (2, 2)
+    assert [(e.line, e.field) for e in result.errors] == [(2, "id_number"), (4, "id_number")]
@@ -0,0 +1,90 @@
+"""Fast "is this username / email free?" checks for registration.
+
+A Bloom filter holds every taken username and email. A miss means the
+value is certainly free in this process's view, so register() skips the
+query; a hit (or a value another worker just inserted) falls through to
+the database, whose unique constraints stay the source of truth.
+"""
+import hashlib
+import math
+import threading
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, User
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+_filter = None
+_lock = threading.Lock()
+
+
+def _keys(username=None, email=None):
+    if username:
+        yield f"u:{username}"
+    if email:
+        yield f"e:{email}"
+
+
+def build():
+    """(Re)build the filter from the users table, sized with room to grow."""
+    global _filter
+    total = db.session.query(db.func.count(User.id)).scalar()
+    bloom = BloomFilter(capacity=max(10_000, total * 2))
+    for username, email in db.session.execute(select(User.username, User.email).execution_options(yield_per=5000)):
+        for key in _keys(username, email):
+            bloom.add(key)
+    with _lock:
+        _filter = bloom
+    return bloom
+
+
+def might_be_taken(username, email):
+    """False only if neither value is in use; True means "ask the database"."""
+    bloom = _filter or build()
+    return any(key in bloom for key in _keys(username, email))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_users(session, flush_context):
+    bloom = _filter
+    if bloom is None:
+        return
+    users = [obj for obj in (*session.new, *session.dirty) if isinstance(obj, User)]
+    if not users:
+        return
+    with _lock:
+        for user in users:
+            # Old values of renamed users stay in; that only costs a query
+            for key in _keys(user.username, user.email):
+                bloom.add(key)
+    if bloom.count > bloom.capacity:
+        invalidate()
+
+
+def invalidate():
+    global _filter
+    with _lock:
+        _filter = None
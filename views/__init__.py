@@ -0,0 +1,9 @@
+from views import auth, main, lecturer, reviews, api
+
+
+def register_blueprints(app):
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(main.bp)
+    app.register_blueprint(lecturer.bp)
+    app.register_blueprint(reviews.bp)
+    app.register_blueprint(api.bp)
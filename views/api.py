@@ -0,0 +1,140 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+
+from models import db, PeerReview, SelfAssessment, AnonymousReview
+from roster import get_roster
+from scheduler import review_window_error
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+SELF_ASSESSMENT_FIELDS = ("summary", "challenges", "different", "role", "feedback")
+REQUIRED_SELF_ASSESSMENT_FIELDS = ("summary", "challenges", "different", "role")
+
+
+def _error(status, *errors):
+    return jsonify({"status": "error", "errors": list(errors)}), status
+
+
+@bp.before_request
+def _require_student():
+    if not current_user.is_authenticated:
+        return _error(401, "Login required.")
+    if current_user.role != "student":
+        return _error(403, "This endpoint is for students only.")
+
+
+@bp.route("/groups/<int:group_id>/roster", methods=["GET"])
+def group_roster(group_id):
+    """Members of the student's group, for rendering the review form client-side."""
+    roster = get_roster(group_id)
+    if current_user.id not in roster.member_ids:
+        return _error(403, "You are not a member of this group.")
+    return jsonify({
+        "group_id": group_id,
+        "members": [{"id": m.id, "full_name": m.full_name} for m in roster.members],
+    })
+
+
+def _validate_submission(payload, roster):
+    """Return (reviews, anonymous_text, self_assessment, errors) from a submission body."""
+    errors = []
+    reviews = {}
+    items = payload.get("reviews") or []
+    if not isinstance(items, list):
+        errors.append("reviews must be a list.")
+        items = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f"reviews[{i}] must be an object.")
+            continue
+        try:
+            reviewee_id = int(item.get("reviewee_id"))
+            score = int(item.get("score"))
+        except (TypeError, ValueError):
+            errors.append(f"reviews[{i}] needs integer reviewee_id and score.")
+            continue
+        if reviewee_id == current_user.id:
+            errors.append(f"reviews[{i}]: you cannot review yourself.")
+        elif reviewee_id not in roster.member_ids:
+            errors.append(f"reviews[{i}]: student {reviewee_id} is not in this group.")
+        elif reviewee_id in reviews:
+            errors.append(f"reviews[{i}]: student {reviewee_id} is reviewed twice.")
+        elif not 1 <= score <= 5:
+            errors.append(f"reviews[{i}]: scores must be between 1 and 5.")
+        else:
+            reviews[reviewee_id] = (score, (item.get("comment") or "").strip())
+
+    required = len(roster.member_ids) - 1
+    if not errors and len(reviews) != required:
+        errors.append(f"You must review all {required} other students in your group.")
+
+    anonymous_text = (payload.get("anonymous_review") or "").strip()
+
+    self_assessment = payload.get("self_assessment")
+    if not isinstance(self_assessment, dict):
+        errors.append("self_assessment is required.")
+        self_assessment = {}
+    else:
+        self_assessment = {f: (self_assessment.get(f) or "").strip() for f in SELF_ASSESSMENT_FIELDS}
+        missing = [f for f in REQUIRED_SELF_ASSESSMENT_FIELDS if not self_assessment[f]]
+        if missing:
+            errors.append("self_assessment is missing: " + ", ".join(missing) + ".")
+
+    return reviews, anonymous_text, self_assessment, errors
+
+
+@bp.route("/groups/<int:group_id>/submission", methods=["POST"])
+def submit(group_id):
+    """Save a student's peer reviews, anonymous review and self-assessment in one transaction.
+
+    Body::
+
+        {"reviews": [{"reviewee_id": 2, "score": 4, "comment": "..."}, ...],
+         "anonymous_review": "...",
+         "self_assessment": {"summary": "...", "challenges": "...", "different": "...",
+                             "role": "...", "feedback": "..."}}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return _error(400, "Expected a JSON object.")
+
+    roster = get_roster(group_id)
+    if current_user.id not in roster.member_ids:
+        return _error(403, "You are not a member of this group.")
+
+    window_error = review_window_error(roster.subject_id)
+    if window_error:
+        return _error(409, window_error)
+
+    reviews, anonymous_text, assessment_data, errors = _validate_submission(payload, roster)
+    if errors:
+        return _error(400, *errors)
+
+    try:
+        # Deleted through the unit of work, so their search documents go too
+        for prior in PeerReview.query.filter_by(reviewer_id=current_user.id, group_id=group_id):
+            db.session.delete(prior)
+        db.session.add_all([
+            PeerReview(reviewer_id=current_user.id, reviewee_id=reviewee_id, group_id=group_id,
+                       score=score, comment=comment)
+            for reviewee_id, (score, comment) in reviews.items()
+        ])
+
+        if anonymous_text:
+            db.session.add(AnonymousReview(reviewee_id=current_user.id, group_id=group_id, comment=anonymous_text))
+
+        assessment = SelfAssessment.query.filter_by(user_id=current_user.id, group_id=group_id).first()
+        if assessment is None:
+            assessment = SelfAssessment(user_id=current_user.id, group_id=group_id)
+            db.session.add(assessment)
+        for field, value in assessment_data.items():
+            setattr(assessment, field, value)
+        assessment.feedback = assessment.feedback or None
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Error saving API submission")
+        return _error(500, "An error occurred while saving your submission.")
+
+    return jsonify({"status": "ok", "group_id": group_id, "reviews": len(reviews)}), 201
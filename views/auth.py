@@ -0,0 +1,126 @@
+from datetime import datetime
+import logging
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import login_user, logout_user, login_required, current_user
+from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+import ratelimit
+import uniqueness
+from models import db, User
+
+bp = Blueprint("auth", __name__)
+
+logger = logging.getLogger(__name__)
+
+
+@bp.route("/")
+def home():
+    return render_template("login.html", title="Login Page", current_year=datetime.now().year)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form.get("username")
+        password = request.form.get("password")
+        selected_role = request.form.get("role")
+
+        # Rejected before the user lookup and the password hash
+        limiter = ratelimit.login_limiter
+        if limiter.blocked(username, request.remote_addr):
+            flash(f"Too many failed login attempts. Try again in {max(1, limiter.window // 60)} minutes.", "danger")
+            return render_template("login.html"), 429
+
+        user = User.query.filter_by(username=username).first()
+
+        if user:
+            if user.role == selected_role and check_password_hash(user.password, password):
+                login_user(user)
+                limiter.succeeded(username, request.remote_addr)
+                flash(f"Login successful as {selected_role}!", "success")
+                logger.info("User %s (%s) logged in", username, selected_role)
+                return redirect(url_for("main.dashboard"))
+            else:
+                limiter.failed(username, request.remote_addr)
+                if user.role != selected_role:
+                    flash(f"Role mismatch. You are registered as {user.role}, not {selected_role}.", "danger")
+                else:
+                    flash("Invalid password. Try again.", "danger")
+                logger.warning("Failed login attempt for %s (%s)", username, selected_role)
+        else:
+            limiter.failed(username, request.remote_addr)
+            flash("Username not found. Please register or check your input.", "danger")
+            logger.warning("Failed login attempt for unknown user %s", username)
+
+    return render_template("login.html")
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        id_number = (request.form.get("id_number") or "").strip() or None  # lecturers leave it empty
+        first_name = request.form.get("first_name")
+        last_name = request.form.get("last_name")
+        username = request.form.get("username")
+        email = request.form.get("email")
+        password = request.form.get("password") 
+        role = request.form.get('role', 'student') 
+        gender = request.form.get('gender') 
+
+        # Most sign-ups use fresh names: the Bloom filter answers those without a query
+        existing_user = uniqueness.might_be_taken(username, email) and db.session.query(User.id).filter(
+            or_(User.username == username, User.email == email)).first()
+        if not existing_user and id_number:
+            existing_user = db.session.query(User.id).filter(User.id_number == id_number).first()
+        if existing_user:
+            flash("Username, Email or Student ID already exists. Please try again.", "warning")
+            return redirect(url_for('auth.register'))
+
+        hashed_pw = generate_password_hash(password, method='pbkdf2:sha256')
+        new_user = User(id_number = id_number, first_name = first_name, last_name = last_name, username=username, email=email, password=hashed_pw, role=role, gender=gender)
+        
+        try:
+            db.session.add(new_user)
+            db.session.commit()
+        except IntegrityError:
+            # Taken by a sign-up in another worker since the check; the unique constraints decide
+            db.session.rollback()
+            flash("Username, Email or Student ID already exists. Please try again.", "warning")
+            return redirect(url_for('auth.register'))
+
+        flash("Registration successful! Please login.", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template("register.html")
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash("You have been logged out.", "info")
+    return redirect(url_for("auth.login"))
+
+@bp.route('/change_password', methods=["GET", "POST"])
+@login_required
+def change_password():
+    if request.method == 'POST':
+        old_password = request.form['old_password']
+        new_password = request.form['new_password']
+        confirm_password = request.form['confirm_password']
+
+        if not check_password_hash(current_user.password, old_password):
+            flash("Old password is incorrect.", "danger")
+            return redirect(url_for('auth.change_password'))
+        
+        if new_password != confirm_password:
+            flash("New passwords do not match.", "danger")
+            return redirect(url_for('auth.change_password'))
+        
+        current_user.password = generate_password_hash(new_password)
+        db.session.commit()
+
+        flash("Password updated successfully!", "success")
+        return redirect(url_for('main.dashboard'))
+    
+    return render_template('change_password.html')
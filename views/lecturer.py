@@ -0,0 +1,373 @@
+from datetime import datetime
+import logging
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app, g
+from flask_login import login_required, current_user
+from sqlalchemy import delete, func, select
+
+from models import db, User, Subject, Group, GroupMember, PeerReview, Setting
+from replica import read_replica
+from cache import conditional_page, lecturer_version, subject_version, user_version
+from helpers import allowed_file
+from grading import freeze_subject, NOTHING_TO_FREEZE
+
+bp = Blueprint("lecturer", __name__)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- SUBJECT ---------------- #
+@bp.route("/subjects", methods=["GET"])
+@login_required
+@conditional_page(lambda: user_version())
+def list_subjects():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    subjects = Subject.query.filter_by(lecturer_id=current_user.id).order_by(Subject.name).all()
+    return render_template("subject.html", subjects=subjects)
+
+@bp.route("/subjects/create", methods=["POST"])
+@login_required
+def create_subject():
+    if current_user.role != "lecturer":
+        flash("Only lecturers can create subjects", "danger")
+        return redirect(url_for("main.dashboard"))
+
+    name = (request.form.get("name") or "").strip()
+    term = (request.form.get("term") or "").strip() or None
+
+    if not name:
+        flash("Subject name is required", "error")
+    else:
+        try:
+            s = Subject(name=name, term=term, lecturer_id=current_user.id)
+            db.session.add(s)
+            db.session.commit()
+            flash("Subject created", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error creating subject: {e}", "error")
+
+    return redirect(url_for("main.dashboard"))
+
+@bp.route("/subjects/<int:subject_id>/delete", methods=["POST"])
+@login_required
+def delete_subject(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    if db.session.query(Subject.id).filter_by(id=subject_id, lecturer_id=current_user.id).first() is None:
+        abort(404)
+    try:
+        # One statement; groups, members, reviews and settings go via ON DELETE CASCADE
+        db.session.execute(delete(Subject).where(Subject.id == subject_id),
+                           execution_options={"synchronize_session": False})
+        db.session.commit()
+        flash("Subject deleted", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error deleting subject: {e}", "error")
+    return redirect(url_for("lecturer.list_subjects"))
+
+@bp.route("/subjects/<int:subject_id>/freeze", methods=["POST"])
+@login_required
+def freeze_marks(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    subj = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+    if subj.archived_at:
+        flash("This subject is archived, its final marks can no longer change", "error")
+        return redirect(url_for("reviews.results", subject_id=subject_id, group_id=request.form.get("group_id", type=int)))
+    try:
+        version = freeze_subject(subject_id)
+        if version == NOTHING_TO_FREEZE:
+            flash("Nothing to freeze: no peer reviews have been submitted yet", "info")
+        elif version:
+            flash(f"Final marks frozen (version {version})", "success")
+        else:
+            flash("Marks were frozen by someone else at the same time, try again", "error")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error freezing marks: {e}", "error")
+    return redirect(url_for("reviews.results", subject_id=subject_id, group_id=request.form.get("group_id", type=int)))
+
+@bp.route("/subjects/<int:subject_id>/remind", methods=["POST"])
+@login_required
+def send_reminders(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    subj = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+
+    import reminders
+
+    try:
+        result = reminders.send_reminders(reminders.get_backend(), subject_id=subj.id)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Sending reminders for subject %s failed", subj.id)
+        flash(f"Error sending reminders: {e}", "error")
+    else:
+        if not result.students:
+            flash("Every student has finished their reviews", "success")
+        else:
+            flash(f"Reminded {result.sent} students ({result.skipped} were already reminded today)", "success")
+    return redirect(url_for("reviews.missing_reviews", subject_id=subj.id))
+
+# ---------------- GROUP ---------------- #
+@bp.route("/subjects/<int:subject_id>/groups", methods=["GET", "POST"])
+@login_required
+def manage_groups(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    
+    subj = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+
+    if request.method == "POST":
+        name = (request.form.get("name") or "").strip()
+        if not name:
+            flash("Group name required", "error")
+        else:
+            try:
+                g = Group(name=name, subject_id=subject_id)
+                db.session.add(g)
+                db.session.commit()
+                flash("Group created", "success")
+                return redirect(url_for("lecturer.manage_groups", subject_id=subject_id))
+            except Exception as e:
+                db.session.rollback()
+                flash(f"Error creating group: {e}", "error")
+
+    groups = Group.query.filter_by(subject_id=subject_id).order_by(Group.name).all()
+    students = User.query.filter_by(role="student").all()
+    return render_template("groups.html", subject=subj, groups=groups, students=students)
+
+@bp.route("/subjects/<int:subject_id>/add_student_to_group", methods=["POST"])
+@login_required
+def add_student_to_group(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+    student_id = (request.form.get("student_id") or 0)
+    group_id = int(request.form.get("group_id") or 0)
+    if student_id and group_id:
+        try:
+            membership = GroupMember(group_id=group_id, id_number=student_id)
+            db.session.add(membership)
+            db.session.commit()
+            flash("Student added to group", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error adding student to group: {e}", "error")
+    return redirect(url_for("lecturer.manage_groups", subject_id=subject_id))
+
+@bp.route("/groups/<int:group_id>/delete", methods=["POST"])
+@login_required
+def delete_group(group_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    grp = db.session.query(Group.subject_id, Subject.lecturer_id).join(Subject).filter(Group.id == group_id).first()
+    if grp is None:
+        abort(404)
+    if grp.lecturer_id != current_user.id:
+        abort(403)
+    subject_id = grp.subject_id
+    try:
+        db.session.execute(delete(Group).where(Group.id == group_id), execution_options={"synchronize_session": False})
+        db.session.commit()
+        flash("Group deleted", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error deleting group: {e}", "error")
+    return redirect(url_for("lecturer.manage_groups", subject_id=subject_id))
+
+@bp.route("/subjects/<int:subject_id>/groups/view", methods=["GET"])
+@login_required
+@read_replica
+@conditional_page(lambda subject_id: subject_version(subject_id))
+def view_groups(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    subject = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+    groups = Group.query.filter_by(subject_id=subject_id).order_by(Group.name).all()
+
+    # Assuming you have a PeerReview model linked to groups
+    peer_reviews = {}
+    for group in groups:
+        reviews = PeerReview.query.filter_by(group_id=group.id).all()
+        peer_reviews[group.id] = reviews
+
+    return render_template("view_groups.html", subject=subject, groups=groups, peer_reviews=peer_reviews)
+
+# ---------------- STUDENTS / USERS ---------------- #
+@bp.route("/students", methods=["GET", "POST"])
+@login_required
+def manage_students():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    # Dapatkan subjek pensyarah
+    subjects = Subject.query.filter_by(lecturer_id=current_user.id).order_by(Subject.name).all()
+    subject_ids = [s.id for s in subjects]
+    groups = Group.query.filter(Group.subject_id.in_(subject_ids)).order_by(Group.name).all()
+    group_ids = [g.id for g in groups]
+
+    # Dapatkan pelajar dalam kumpulan tersebut
+    students = User.query.join(GroupMember).filter(
+        GroupMember.group_id.in_(group_ids),
+        User.role == "student"
+    ).order_by(User.first_name).all() if group_ids else []
+
+    if request.method == "POST":
+        first_name = (request.form.get("first_name") or "").strip()
+        last_name = (request.form.get("last_name") or "").strip()
+        email = (request.form.get("email") or "").strip()
+        username = (request.form.get("username") or "").strip()
+        password = (request.form.get("password") or "").strip()
+        role = "student"
+        subject_id = int(request.form.get("subject_id") or 0) or None
+        group_id = int(request.form.get("group_id") or 0) or None
+
+        if subject_id and subject_id not in subject_ids:
+            flash("Anda hanya boleh menambah pelajar ke subjek anda sendiri", "error")
+            return redirect(url_for("lecturer.manage_students"))
+
+        if not first_name or not last_name or not email or not username or not password:
+            flash("All fields are required", "error")
+        else:
+            try:
+                user = User(
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=email,
+                    username=username,
+                    password=password,
+                    role=role
+                )
+                db.session.add(user)
+                db.session.commit()
+
+                # Add to group if selected
+                if group_id:
+                    membership = GroupMember(group_id=group_id,  id_number=user.id)
+                    db.session.add(membership)
+                    db.session.commit()
+
+                flash("Student added", "success")
+                return redirect(url_for("lecturer.manage_students"))
+            except Exception as e:
+                db.session.rollback()
+                flash(f"Error adding student: {e}", "error")
+
+    g.page_version = lecturer_version(current_user.id)
+    # Rows list memberships in every subject, including other lecturers' groups
+    membership_stamps = {
+        uid: f"{n}|{joined}" for uid, n, joined in db.session.execute(
+            select(GroupMember.id_number, func.count(GroupMember.id), func.max(GroupMember.joined_at))
+            .where(GroupMember.id_number.in_([s.id for s in students]))
+            .group_by(GroupMember.id_number)
+        )
+    } if students else {}
+    logger.debug("Listing %d students for lecturer %s", len(students), current_user.id)
+    return render_template("students.html", students=students, subjects=subjects, groups=groups,
+                           membership_stamps=membership_stamps)
+
+@bp.route("/students/<id_number>/delete", methods=["POST"])
+@login_required
+def delete_student( id_number):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    user_id = db.session.query(User.id).filter(User.id == id_number).scalar()
+    if user_id is None:
+        abort(404)
+    # Check if student is in lecturer's groups
+    group_ids = select(Group.id).join(Subject).where(Subject.lecturer_id == current_user.id)
+    if not db.session.query(GroupMember.id).filter(GroupMember.id_number == user_id,
+                                                   GroupMember.group_id.in_(group_ids)).first():
+        abort(403)
+    try:
+        db.session.execute(delete(User).where(User.id == user_id), execution_options={"synchronize_session": False})
+        db.session.commit()
+        flash("Student removed", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error removing student: {e}", "error")
+    return redirect(url_for("lecturer.manage_students"))
+
+# ---------------- IMPORT CSV ---------------- #
+@bp.route("/students/import", methods=["GET", "POST"])
+@login_required
+def import_students():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+      
+    subject_ids = [s.id for s in Subject.query.filter_by(lecturer_id=current_user.id).all()]
+    valid_group_ids = [g.id for g in Group.query.filter(Group.subject_id.in_(subject_ids)).all()]
+
+    if request.method == "POST":
+        f = request.files.get("file")
+        if not f or f.filename == "":
+            flash("Please choose a CSV file", "error")
+            return redirect(url_for("lecturer.import_students"))
+        if not allowed_file(f.filename):
+            flash("Only .csv allowed", "error")
+            return redirect(url_for("lecturer.import_students"))
+
+        # CSV handling is rarely used, keep it out of worker boot
+        import student_import
+
+        # Parsed straight from the upload stream, nothing is written to UPLOAD_FOLDER
+        result = student_import.import_students_csv(
+            f.stream, valid_group_ids, chunk_size=current_app.config["IMPORT_CHUNK_SIZE"]
+        )
+        logger.info("Student import by lecturer %s: %d inserted, %d skipped, %d errors",
+                    current_user.id, result.inserted, result.skipped, result.error_count)
+        flash(f"CSV processed: {result.inserted} inserted, {result.skipped} skipped", "success")
+        if not result.error_count:
+            return redirect(url_for("lecturer.manage_students"))
+
+        return render_template("import_students.html", result=result,
+                               report_uri=student_import.report_data_uri(result))
+    return render_template("import_students.html")
+
+# ---------------- SETTINGS ---------------- #
+@bp.route("/settings", methods=["GET", "POST"])
+@login_required
+def settings():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("auth.home"))
+    subjects = Subject.query.filter_by(lecturer_id=current_user.id).order_by(Subject.name).all()
+    if not subjects:
+        flash("Create a subject first", "error")
+        return redirect(url_for("lecturer.list_subjects"))
+
+    subject_id = request.args.get("subject_id", type=int) or subjects[0].id
+    subject = next((s for s in subjects if s.id == subject_id), None)
+    if subject is None:
+        abort(404)
+
+    setting = Setting.query.filter_by(subject_id=subject.id).first() or Setting(subject_id=subject.id)
+    if request.method == "POST":
+        setting.criteria = request.form.get("criteria")
+        setting.max_score = int(request.form.get("max_score") or 5)
+        setting.opens_at = datetime.strptime(request.form.get("opens_at"), "%Y-%m-%dT%H:%M") if request.form.get("opens_at") else None
+        setting.deadline = datetime.strptime(request.form.get("deadline"), "%Y-%m-%dT%H:%M") if request.form.get("deadline") else None
+        if subject.archived_at:
+            db.session.rollback()
+            flash("This subject is archived, its review window can no longer change", "error")
+        elif setting.opens_at and setting.deadline and setting.opens_at >= setting.deadline:
+            flash("The review window must open before the deadline", "error")
+        else:
+            db.session.add(setting)
+            db.session.commit()
+            flash("Settings updated", "success")
+    return render_template("settings.html", setting=setting, subject=subject, subjects=subjects)
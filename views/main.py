@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+from cache import conditional_page
+from dashboard import get_dashboard, dashboard_version
+from metrics import snapshot
+
+bp = Blueprint("main", __name__)
+
+
+@bp.app_context_processor
+def inject_current_year():
+    return {"current_year": datetime.now().year}
+
+
+@bp.route('/dashboard')
+@login_required
+@conditional_page(lambda: dashboard_version(current_user))
+def dashboard():
+    if current_user.role == "student":
+        return render_template(
+            'dashboard.html',
+            user=current_user,
+            current_year=datetime.now().year,
+            assigned_groups=get_dashboard(current_user).rows
+        )
+
+    elif current_user.role == "lecturer":
+        subjects = get_dashboard(current_user).rows
+        prefix = "Mr." if current_user.gender.lower() == "male" else "Ms."
+        return render_template(
+            'dashboard.html',
+            user=current_user,
+            prefix=prefix,
+            current_year=datetime.now().year,
+            subjects=subjects
+        )
+    else:
+        flash("Role is not recognized", "danger")
+        return redirect(url_for("auth.logout"))
+
+@bp.route("/profile", methods=["GET", "POST"])
+@login_required
+def profile():
+    if current_user.role == "student":
+        return redirect(url_for("main.student_profile"))
+    elif current_user.role == "lecturer":
+        return redirect(url_for("main.lecturer_profile"))
+    else:
+        flash("Role is not recognized.", "danger")
+        return redirect(url_for("main.dashboard"))
+
+@bp.route("/student/profile", methods=["GET", "POST"])
+@login_required
+def student_profile():
+    if current_user.role != "student":
+        flash("Unauthorized access.", "danger")
+        return redirect(url_for("main.dashboard"))
+    
+    return render_template("student_profile.html", user=current_user)
+
+@bp.route("/lecturer/profile", methods=["GET", "POST"])
+@login_required
+def lecturer_profile():
+    if current_user.role != "lecturer":
+        flash("Unauthorized access.", "danger")
+        return redirect(url_for("main.dashboard"))
+    
+    if request.method == "POST":
+        current_user.first_name = request.form["first_name"]
+        current_user.last_name = request.form["last_name"]
+        current_user.email = request.form["email"]
+        current_user.id_number = request.form["id_number"].strip() or None  # blank means no ID number
+        current_user.username = request.form["username"]
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Username, Email or ID number already exists. Please try again.", "warning")
+            return redirect(url_for("main.lecturer_profile"))
+        flash("Profile updated successfully!", "success")
+    
+    return render_template("lecturer_profile.html", user=current_user)
+
+
+# ---------------- METRICS ---------------- #
+@bp.route("/metrics")
+@login_required
+def metrics():
+    if current_user.role != "lecturer":
+        abort(403)
+    return jsonify(snapshot(db))
@@ -0,0 +1,631 @@
+import importlib.util
+from collections import defaultdict
+from datetime import datetime
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, abort, current_app, Response, stream_with_context
+from flask_login import login_required, current_user
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import aliased, undefer_group
+
+from models import db, User, Subject, Group, GroupMember, PeerReview, SelfAssessment, AnonymousReview, review_tables
+from replica import read_replica
+from cache import conditional_page, subject_version
+from helpers import get_completion_status
+from roster import get_roster
+from grading import get_snapshot, final_mark as compute_final_mark
+from scheduler import review_window_error
+from anonymous_feedback import get_release
+
+bp = Blueprint("reviews", __name__)
+
+
+# ---------------- REVIEW LISTING / EXPORT ---------------- #
+def _lecturer_reviews(lecturer_id):
+    """Peer reviews in a lecturer's subjects with reviewer/reviewee names joined in, unordered."""
+    reviewer = aliased(User)
+    reviewee = aliased(User)
+    return (
+        db.session.query(
+            PeerReview.id, PeerReview.score, PeerReview.comment, PeerReview.created_at,
+            (reviewer.first_name + " " + reviewer.last_name).label("reviewer_name"),
+            (reviewee.first_name + " " + reviewee.last_name).label("reviewee_name"),
+            Group.name.label("group_name"), Subject.name.label("subject_name"),
+        )
+        .join(Group, Group.id == PeerReview.group_id)
+        .join(Subject, Subject.id == Group.subject_id)
+        .outerjoin(reviewer, reviewer.id == PeerReview.reviewer_id)
+        .outerjoin(reviewee, reviewee.id == PeerReview.reviewee_id)
+        .filter(Subject.lecturer_id == lecturer_id)
+    )
+
+
+@bp.route("/reviews")
+@login_required
+@read_replica
+def show_reviews():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+
+    page_size = current_app.config["REVIEWS_PAGE_SIZE"]
+    query = _lecturer_reviews(current_user.id)
+
+    # Keyset pagination on (created_at, id): "cursor" is the last row of the previous page.
+    # Rows without a created_at come after every dated row, newest id first; their cursor has no timestamp.
+    cursor = request.args.get("cursor")
+    ts = None
+    if cursor:
+        try:
+            ts, _, last_id = cursor.rpartition("_")
+            ts, last_id = datetime.fromisoformat(ts) if ts else None, int(last_id)
+        except ValueError:
+            abort(400)
+
+    rows = []
+    if not cursor or ts is not None:
+        dated = query.filter(PeerReview.created_at.is_not(None))
+        if cursor:
+            dated = dated.filter(or_(
+                PeerReview.created_at < ts,
+                and_(PeerReview.created_at == ts, PeerReview.id < last_id),
+            ))
+        rows = dated.order_by(PeerReview.created_at.desc(), PeerReview.id.desc()).limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        undated = query.filter(PeerReview.created_at.is_(None))
+        if cursor and ts is None:
+            undated = undated.filter(PeerReview.id < last_id)
+        rows += undated.order_by(PeerReview.id.desc()).limit(page_size + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = f"{last.created_at.isoformat() if last.created_at else ''}_{last.id}"
+    return render_template("reviews.html", reviews=rows, next_cursor=next_cursor, is_first_page=not cursor)
+
+@bp.route("/reviews/search")
+@login_required
+@read_replica
+def search_reviews():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+
+    from search import search
+
+    q = (request.args.get("q") or "").strip()
+    subject_id = request.args.get("subject_id", type=int)
+    page = max(request.args.get("page", 1, type=int), 1)
+    hits, has_next = search(q, current_user.id, subject_id=subject_id, page=page,
+                            page_size=current_app.config["SEARCH_PAGE_SIZE"]) if q else ([], False)
+    subjects = db.session.query(Subject.id, Subject.name).filter(Subject.lecturer_id == current_user.id).order_by(Subject.name).all()
+    return render_template("search.html", q=q, subject_id=subject_id, subjects=subjects,
+                           hits=hits, page=page, has_next=has_next)
+
+@bp.route("/reviews/export")
+@login_required
+@read_replica
+def export_reviews():
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+
+    import csv
+    from io import StringIO
+
+    query = _lecturer_reviews(current_user.id).order_by(PeerReview.created_at.desc(), PeerReview.id.desc())
+
+    def generate():
+        si = StringIO()
+        writer = csv.writer(si)
+        writer.writerow(["Reviewer", "Reviewee", "Score", "Comment", "Timestamp"])
+        for i, r in enumerate(query.yield_per(1000), 1):
+            writer.writerow([
+                r.reviewer_name or "-",
+                r.reviewee_name or "-",
+                r.score,
+                r.comment or "",
+                r.created_at.strftime("%Y-%m-%d %H:%M:%S") if r.created_at else ""
+            ])
+            if i % 1000 == 0:
+                yield si.getvalue()
+                si.seek(0)
+                si.truncate()
+        yield si.getvalue()
+
+    output = Response(stream_with_context(generate()), mimetype="text/csv")
+    output.headers["Content-Disposition"] = "attachment; filename=reviews.csv"
+    return output
+
+@bp.route("/subjects/<int:subject_id>/gradebook")
+@login_required
+@read_replica
+def export_gradebook(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    subject = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+    fmt = request.args.get("format", "csv")
+    filename = f"gradebook-{subject.id}"
+
+    import gradebook
+
+    if fmt == "csv":
+        response = Response(stream_with_context(gradebook.stream_csv(subject.id)), mimetype="text/csv")
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}.csv"
+        return response
+
+    if fmt not in ("arrow", "parquet"):
+        abort(400)
+    if importlib.util.find_spec("pyarrow") is None:  # optional dependency
+        flash("Arrow/Parquet export needs the pyarrow package installed on the server", "error")
+        return redirect(url_for("reviews.results", subject_id=subject.id))
+
+    if fmt == "arrow":
+        response = Response(stream_with_context(gradebook.stream_arrow(subject.id)),
+                            mimetype="application/vnd.apache.arrow.stream")
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}.arrows"
+    else:
+        response = Response(gradebook.write_parquet(subject.id), mimetype="application/vnd.apache.parquet")
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}.parquet"
+    return response
+
+@bp.route("/subjects/<int:subject_id>/missing_reviews")
+@login_required
+@read_replica
+def missing_reviews(subject_id):
+    if current_user.role != "lecturer":
+        flash("Access denied: Lecturers only", "error")
+        return redirect(url_for("main.dashboard"))
+    subject = Subject.query.filter_by(id=subject_id, lecturer_id=current_user.id).first_or_404()
+
+    import missing_reviews as report
+
+    if request.args.get("format") == "csv":
+        response = Response(stream_with_context(report.stream_csv(subject.id)), mimetype="text/csv")
+        response.headers["Content-Disposition"] = f"attachment; filename=missing-reviews-{subject.id}.csv"
+        return response
+    outstanding = report.by_reviewer(subject.id)
+    return render_template("missing_reviews.html", subject=subject, outstanding=outstanding,
+                           missing_count=sum(len(o.reviewees) for o in outstanding))
+
+# ---------------- PEER REVIEW ROUTES ---------------- #
+@bp.route("/start_peer_review")
+@login_required
+def start_peer_review():
+    """Entry point: sets group & subject then redirects to peer_review page."""
+
+    group_id = request.args.get("group_id", type=int)
+    subject_id = request.args.get("subject_id", type=int)
+
+    # Students → fall back to their own group if missing
+    if current_user.role == "student":
+        if not group_id or not subject_id:
+            user_groups = GroupMember.query.filter_by(id_number=current_user.id).all()
+            if user_groups:
+                group_id = group_id or user_groups[0].group_id
+                group = Group.query.get(group_id)
+                if group and group.subject_id:
+                    subject_id = subject_id or group.subject_id
+
+    # Lecturers must be given group_id + subject_id in the link
+    if current_user.role == "lecturer" and (not group_id or not subject_id):
+        flash("Please select a subject and group to view.", "error")
+        return redirect(url_for("main.dashboard"))
+
+    # Save to session
+    if group_id:
+        session["current_group_id"] = group_id
+    if subject_id:
+        session["current_subject_id"] = subject_id
+    session["current_user_id"] = current_user.id
+
+    return redirect(url_for("reviews.peer_review", group_id=group_id, subject_id=subject_id))
+
+@bp.route("/peer_review")
+@login_required
+def peer_review():
+    """Peer review page."""
+
+    # Query string first, then session
+    group_id = request.args.get("group_id", type=int) or session.get("current_group_id")
+    subject_id = request.args.get("subject_id", type=int) or session.get("current_subject_id")
+
+    if not group_id or not subject_id:
+        flash("Please select a group and subject first.", "error")
+        return redirect(url_for("main.dashboard"))
+
+    # Ensure session stays updated
+    session["current_group_id"] = group_id
+    session["current_subject_id"] = subject_id
+    session["current_user_id"] = current_user.id
+
+    # Get group and subject
+    group = Group.query.get_or_404(group_id)
+    subject = Subject.query.get_or_404(subject_id)
+
+    # Fetch students in group
+    group_students = get_roster(group_id).members
+
+    # Flag if peer review possible
+    can_review = len(group_students) >= 2
+
+    # Completion status
+    completion_status = get_completion_status(group_students, group_id)
+    completed_count = sum(1 for v in completion_status.values() if v["completed"])
+    total_students = len(group_students)
+    all_completed = all(v["completed"] for v in completion_status.values()) if group_students else False
+
+    # Results (only avg score once everyone is done)
+    results = []
+    if all_completed:
+        # One query for the group, bucketed per reviewee
+        scores = defaultdict(list)
+        for reviewee_id, score in db.session.query(PeerReview.reviewee_id, PeerReview.score).filter(
+                PeerReview.group_id == group_id):
+            scores[reviewee_id].append(score)
+        for student in group_students:
+            received = scores.get(student.id)
+            if received:
+                avg_peer_score = sum(received) / len(received)
+                results.append({
+                    "student_name": student.full_name,
+                    "avg_score": round(avg_peer_score, 2)
+                })
+
+    return render_template(
+        "peer_review.html",
+        group_students=group_students,
+        completion_status=completion_status,
+        completed_count=completed_count,
+        total_students=total_students,
+        all_completed=all_completed,
+        results=results,
+        group=group,
+        subject=subject,
+        can_review=can_review  # 🔑 pass to template
+    )
+
+@bp.route("/switch_user_and_form/<int:user_id>")
+@login_required
+def switch_user_and_form(user_id):
+    """Switch to a specific user and go to form"""
+    if current_user.role != "student":
+        flash("This page is for students only.", "error")
+        return redirect(url_for('main.dashboard'))
+    
+    # Get group and subject from query parameters or session
+    group_id = request.args.get('group_id', type=int) or session.get('current_group_id')
+    subject_id = request.args.get('subject_id', type=int) or session.get('current_subject_id')
+    
+    if not group_id or not subject_id:
+        flash("Please select a group and subject first.", "error")
+        return redirect(url_for('main.dashboard'))
+    
+    # Verify the user is in the same group
+    if get_roster(group_id).member(user_id) is None:
+        flash("Invalid student selection.", "error")
+        return redirect(url_for('reviews.peer_review', group_id=group_id, subject_id=subject_id))
+    
+    # Set the current user in session
+    session["current_user_id"] = user_id
+    session['current_group_id'] = group_id
+    session['current_subject_id'] = subject_id
+    
+    return redirect(url_for('reviews.form', group_id=group_id, subject_id=subject_id))
+
+@bp.route("/form", methods=["GET", "POST"])
+@login_required
+def form():
+    """Peer review form"""
+    if current_user.role != "student":
+        flash("This page is for students only.", "error")
+        return redirect(url_for('main.dashboard'))
+
+    group_id = request.args.get("group_id", type=int)
+    subject_id = request.args.get("subject_id", type=int)
+    if not group_id or not subject_id:
+        flash("Please select a group and subject first.", "error")
+        return redirect(url_for('main.dashboard'))
+
+    # The group decides the subject; the review window below is the group's
+    roster = get_roster(group_id)
+    if roster.subject_id != subject_id:
+        flash("This group does not belong to the selected subject.", "error")
+        return redirect(url_for('main.dashboard'))
+
+    # Always update session
+    session["current_group_id"] = group_id
+    session["current_subject_id"] = subject_id
+
+    current_user_id = session.get("current_user_id")
+    if not current_user_id:
+        flash("Please select yourself from the peer review page first.", "info")
+        return redirect(url_for("reviews.peer_review", group_id=group_id, subject_id=subject_id))
+
+    current_member = roster.member(current_user_id)
+    if not current_member:
+        flash("Invalid user session.", "error")
+        return redirect(url_for("reviews.peer_review", group_id=group_id, subject_id=subject_id))
+
+    if request.method == "POST":
+        window_error = review_window_error(roster.subject_id)
+        if window_error:
+            flash(window_error, "error")
+            return redirect(url_for("reviews.peer_review", group_id=group_id, subject_id=subject_id))
+
+        try:
+            reviewee_ids = request.form.getlist("reviewee_id[]")
+            scores = request.form.getlist("score[]")
+            comments = request.form.getlist("comment[]")
+            anon_text = request.form.get("anonymous_review", "").strip()
+
+            if not (len(reviewee_ids) == len(scores) == len(comments)):
+                flash("Mismatch in submitted review data.", "error")
+                return redirect(url_for("reviews.form", group_id=group_id, subject_id=subject_id))
+
+            # Must review all others
+            filtered_reviewees = [int(rid) for rid in reviewee_ids if int(rid) != current_user_id]
+            required_reviews = len(roster.members) - 1
+            if len(filtered_reviewees) != required_reviews:
+                flash(f"You must review all {required_reviews} other students in your group.", "error")
+                return redirect(url_for("reviews.form", group_id=group_id, subject_id=subject_id))
+
+            # Remove prior reviews through the unit of work, so their search documents go too
+            for prior in PeerReview.query.filter_by(reviewer_id=current_user_id, group_id=group_id):
+                db.session.delete(prior)
+
+            for reviewee_id, score_str, comment in zip(reviewee_ids, scores, comments):
+                reviewee_id = int(reviewee_id)
+                if reviewee_id == current_user_id:
+                    continue
+                if reviewee_id not in roster.member_ids:
+                    continue
+
+                try:
+                    score = int(score_str)
+                except ValueError:
+                    flash("Invalid score provided.", "error")
+                    return redirect(url_for("reviews.form", group_id=group_id, subject_id=subject_id))
+
+                if not (1 <= score <= 5):
+                    flash("Scores must be between 1 and 5.", "error")
+                    return redirect(url_for("reviews.form", group_id=group_id, subject_id=subject_id))
+
+                review = PeerReview(
+                    reviewer_id=current_user_id,
+                    reviewee_id=reviewee_id,
+                    score=score,
+                    comment=comment or "",
+                    group_id=group_id
+                )
+                db.session.add(review)
+
+            # Save anonymous review if given
+            if anon_text:
+                anon = AnonymousReview(
+                    reviewee_id=current_user_id,
+                    group_id=group_id,
+                    comment=anon_text
+                )
+                db.session.add(anon)
+
+            db.session.commit()
+            flash("Peer reviews submitted successfully.", "success")
+            return redirect(url_for("reviews.self_assessment", group_id=group_id, subject_id=subject_id))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception("Error saving peer reviews")
+            flash(f"An error occurred while saving your reviews: {str(e)}", "error")
+            return redirect(url_for("reviews.form", group_id=group_id, subject_id=subject_id))
+
+    # GET: load existing reviews
+    prior_reviews = {}
+    existing = PeerReview.query.filter_by(reviewer_id=current_user_id, group_id=group_id).all()
+    for r in existing:
+        prior_reviews[r.reviewee_id] = {"score": r.score, "comment": r.comment}
+
+    group = Group.query.get(group_id)
+    subject = Subject.query.get(subject_id)
+
+    return render_template(
+        "form.html",
+        current_user=current_member,
+        current_user_id=current_user_id,
+        prior_reviews=prior_reviews,
+        students=roster.members,
+        group=group,
+        subject=subject
+    )
+
+@bp.route("/self_assessment/<int:group_id>/<int:subject_id>", methods=["GET", "POST"])
+@login_required
+def self_assessment(group_id, subject_id):
+    group = Group.query.get_or_404(group_id)
+    subject = Subject.query.get_or_404(subject_id)
+    if group.subject_id != subject.id:
+        flash("This group does not belong to the selected subject.", "error")
+        return redirect(url_for("main.dashboard"))
+
+    if request.method == "POST":
+        window_error = review_window_error(group.subject_id)
+        if window_error:
+            flash(window_error, "error")
+            return redirect(url_for("reviews.peer_review", group_id=group.id, subject_id=subject.id))
+
+        summary = request.form.get("summary")
+        challenges = request.form.get("challenges")
+        different = request.form.get("different")
+        role = request.form.get("role")
+        feedback = request.form.get("feedback")
+
+        assessment = SelfAssessment.query.filter_by(
+            user_id=current_user.id,
+            group_id=group.id
+        ).first()
+
+        if assessment:
+            assessment.summary = summary
+            assessment.challenges = challenges
+            assessment.different = different
+            assessment.role = role
+            assessment.feedback = feedback
+        else:
+            assessment = SelfAssessment(
+                user_id=current_user.id,
+                group_id=group.id,
+                summary=summary,
+                challenges=challenges,
+                different=different,
+                role=role,
+                feedback=feedback
+            )
+            db.session.add(assessment)
+
+        db.session.commit()
+        flash("Your self-assessment has been submitted successfully.", "success")
+
+        # redirect to done page
+        return redirect(url_for("reviews.done", group_id=group.id, subject_id=subject.id))
+
+    # GET request → show the form
+    assessment_data = SelfAssessment.query.options(undefer_group("text")).filter_by(
+        user_id=current_user.id,
+        group_id=group.id
+    ).first()
+
+    return render_template(
+        "self_assessment.html",
+        subject=subject,
+        group=group,
+        assessment_data=assessment_data
+    )
+
+def _results_version():
+    subject_id = request.args.get("subject_id", type=int)
+    return subject_version(subject_id) if subject_id else None
+
+@bp.route("/results")
+@login_required
+@read_replica
+@conditional_page(_results_version)
+def results():
+    subject_id = request.args.get("subject_id", type=int)
+    group_id = request.args.get("group_id", type=int)
+
+    if not subject_id:
+        flash("Please select a subject first.", "error")
+        return redirect(url_for("main.dashboard"))
+
+    subject = Subject.query.get_or_404(subject_id)
+
+    # If no group_id, pick the first group in this subject
+    if not group_id and subject.groups:
+        group_id = subject.groups[0].id
+
+    if not group_id:
+        flash("No groups available for this subject yet.", "info")
+        return redirect(url_for("main.dashboard"))
+
+    group = Group.query.get_or_404(group_id)
+    # The page is cached per subject, so the group must be one of its groups
+    if group.subject_id != subject.id:
+        abort(404)
+    roster = get_roster(group_id)
+    group_students = roster.members
+    # Archived subjects are read from the archive tables
+    tables = review_tables(subject.archived_at)
+
+    # Completion tracking
+    status = get_completion_status(group_students, group_id, tables.peer_review, tables.self_assessment)
+    all_completed = all(v["completed"] for v in status.values()) if status else False
+    completed_count = sum(1 for v in status.values() if v["completed"])
+
+    # Frozen marks (freeze button or deadline, see scheduler.tick) win over live rows
+    snapshot = get_snapshot(subject.id)
+    final_marks = snapshot.marks.get(group_id, {}) if snapshot else None
+
+    # One query for the group, bucketed per reviewee
+    received = defaultdict(list)
+    for r in tables.peer_review.query.filter_by(group_id=group_id).order_by(tables.peer_review.id):
+        received[r.reviewee_id].append(r)
+
+    results = {}
+    for student_obj in group_students:
+        reviews = received.get(student_obj.id, [])
+
+        avg_peer_score = final_mark = None
+        if final_marks is not None:
+            marks = final_marks.get(student_obj.id)
+            if marks:
+                avg_peer_score, final_mark = marks["avg_score"], marks["final_mark"]
+        elif all_completed and reviews:
+            avg_peer_score = sum(r.score for r in reviews) / len(reviews)
+            final_mark = compute_final_mark(avg_peer_score)
+
+        peer_comments = [
+            {
+                "reviewer_id": r.reviewer_id,
+                "reviewer": roster.name(r.reviewer_id, "Unknown"),
+                "comment": r.comment.strip(),
+            }
+            for r in reviews if r.comment and r.comment.strip()
+        ]
+
+        results[student_obj.id] = {
+            "avg_score": avg_peer_score,
+            "final_mark": final_mark,
+            "comments": peer_comments,
+        }
+
+    # One query for the group, with the deferred text columns loaded up front
+    assessments = {}
+    for a in (tables.self_assessment.query.options(undefer_group("text"))
+              .filter_by(group_id=group_id).order_by(tables.self_assessment.id.desc())):
+        assessments[a.user_id] = a  # oldest row per student wins, as .first() did
+    self_assessments = [
+        {
+            "student_id": s.id,
+            "student_name": s.full_name,
+            "assessment": assessments[s.id],
+        }
+        for s in group_students if s.id in assessments
+    ]
+
+    # Only lecturers see anonymous comments, and only whole shuffled batches of them
+    is_lecturer = current_user.role == "lecturer"
+    anonymous = get_release(group_id, subject.archived_at) if is_lecturer else None
+
+    return render_template(
+        "results.html",
+        subject=subject,
+        group=group,
+        group_students=group_students,
+        completed_count=completed_count,
+        all_completed=all_completed,
+        snapshot=snapshot,
+        results=results,
+        anonymous=anonymous,
+        self_assessments=self_assessments,
+        current_user=current_user,
+        is_lecturer=is_lecturer,
+    )
+
+@bp.route("/done")
+@login_required  
+def done():
+    """Completion page"""
+    if current_user.role != "student":
+        flash("This page is for students only.", "error")
+        return redirect(url_for('main.dashboard'))
+    
+    group_id = request.args.get('group_id') or session.get('current_group_id')
+    subject_id = request.args.get('subject_id') or session.get('current_subject_id')
+    
+    group = Group.query.get(group_id) if group_id else None
+    subject = Subject.query.get(subject_id) if subject_id else None
+    
+    return render_template("done.html", 
+                         current_user=session.get("current_user"),
+                         group=group, 
+                         subject=subject)